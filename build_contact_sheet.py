@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Vermillion Contact Sheets — tile a directory of logos into one labelled review sheet
+and a sprite atlas for the gallery.
+
+For each directory this writes, in one pass over the sources:
+  sheets/<dir>-contact.png   ← labelled grid on white, for reviewing a whole round at once
+  sheets/<dir>-atlas.png     ← unlabelled RGBA sprite atlas
+  sheets/<dir>-atlas.json    ← sprite coordinates keyed by source path (as used in index.html)
+
+When both <key>.png and <key>-4x.png exist only the base image is used; a -4x file
+with no base image is reduced band by band from the raw cache (see image_tiles.py),
+so memory stays bounded by the canvas size plus --max-memory-mb.
+
+Usage:
+    python3 build_contact_sheet.py                      # selected/
+    python3 build_contact_sheet.py concepts/round3 selected --columns 8
+    python3 build_contact_sheet.py concepts/round3 --cell 192 --workers 8 --max-memory-mb 256
+
+Requires: pip3 install Pillow numpy
+"""
+
+import os
+import sys
+import argparse
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+
+from image_tiles import DEFAULT_MAX_MEMORY_MB, MemoryBudget, thumbnail
+
+BASE_DIR = Path(__file__).parent
+OUTPUT_DIR = BASE_DIR / "sheets"
+
+CELL_SIZE = 256          # thumbnail box, px
+LABEL_HEIGHT = 28        # label band under each contact-sheet cell
+PADDING = 12             # gutter between contact-sheet cells
+ATLAS_GUTTER = 2         # gutter between atlas sprites (avoids bleeding when scaled)
+LABEL_COLOR = (92, 74, 62)        # --text-mid in index.html
+SHEET_BACKGROUND = (250, 247, 242)  # --cream-light in index.html
+
+
+def list_sources(directory: Path) -> List[Path]:
+    """PNG sources in a directory, preferring <key>.png over <key>-4x.png."""
+    pngs = {p.name: p for p in directory.glob("*.png")}
+    sources = []
+    for name, path in sorted(pngs.items()):
+        if path.stem.endswith("-4x") and f"{path.stem[:-3]}.png" in pngs:
+            continue
+        sources.append(path)
+    return sources
+
+
+def label_for(path: Path) -> str:
+    """Display label for a source file."""
+    stem = path.stem
+    return stem[:-3] if stem.endswith("-4x") else stem
+
+
+def over_background(rgba: np.ndarray, background: Tuple[int, int, int]) -> np.ndarray:
+    """Alpha-composite an RGBA array over a solid color, returning RGB uint8."""
+    alpha = rgba[..., 3:4].astype(np.float32) / 255.0
+    rgb = rgba[..., :3].astype(np.float32)
+    bg = np.asarray(background, dtype=np.float32)
+    return (rgb * alpha + bg * (1.0 - alpha) + 0.5).astype(np.uint8)
+
+
+def render_label(text: str, width: int) -> np.ndarray:
+    """Render a centered label band as an RGB array."""
+    band = Image.new("RGB", (width, LABEL_HEIGHT), SHEET_BACKGROUND)
+    draw = ImageDraw.Draw(band)
+    font = ImageFont.load_default(size=13)
+    while draw.textlength(text, font=font) > width - 8 and len(text) > 4:
+        text = text[:-2] + "…"
+    draw.text((width / 2, LABEL_HEIGHT / 2), text, fill=LABEL_COLOR, font=font, anchor="mm")
+    return np.asarray(band)
+
+
+def paint_cell(sheet: np.ndarray, atlas: np.ndarray, index: int, path: Path,
+               thumb: np.ndarray, columns: int, cell: int) -> dict:
+    """Draw one source into its contact-sheet cell and atlas slot; returns its sprite rect."""
+    row, col = divmod(index, columns)
+    h, w = thumb.shape[:2]
+    dx, dy = (cell - w) // 2, (cell - h) // 2
+
+    # Contact sheet cell: thumbnail on white, label underneath
+    x0 = PADDING + col * (cell + PADDING)
+    y0 = PADDING + row * (cell + LABEL_HEIGHT + PADDING)
+    sheet[y0:y0 + cell, x0:x0 + cell] = 255
+    sheet[y0 + dy:y0 + dy + h, x0 + dx:x0 + dx + w] = over_background(thumb, (255, 255, 255))
+    sheet[y0 + cell:y0 + cell + LABEL_HEIGHT, x0:x0 + cell] = render_label(label_for(path), cell)
+
+    # Atlas sprite: raw RGBA, exact thumbnail rect recorded
+    sx = col * (cell + ATLAS_GUTTER)
+    sy = row * (cell + ATLAS_GUTTER)
+    atlas[sy:sy + cell, sx:sx + cell] = 0
+    atlas[sy + dy:sy + dy + h, sx + dx:sx + dx + w] = thumb
+    return {"x": sx + dx, "y": sy + dy, "w": w, "h": h}
+
+
+def sheet_paths(directory: Path) -> Tuple[Path, Path, Path]:
+    """(contact sheet, atlas, atlas map) output paths for a directory."""
+    name = directory.resolve().name
+    return (OUTPUT_DIR / f"{name}-contact.png",
+            OUTPUT_DIR / f"{name}-atlas.png",
+            OUTPUT_DIR / f"{name}-atlas.json")
+
+
+def save_sheets(directory: Path, sheet: np.ndarray, atlas: np.ndarray, atlas_map: dict) -> None:
+    sheet_path, atlas_path, map_path = sheet_paths(directory)
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    Image.fromarray(sheet).save(sheet_path, optimize=True)
+    Image.fromarray(atlas).save(atlas_path, optimize=True)
+    with open(map_path, "w") as f:
+        json.dump(atlas_map, f, indent=2)
+
+
+def build_sheets(directory: Path, columns: int, cell: int, workers: int,
+                 budget: MemoryBudget) -> dict:
+    """Build contact sheet, atlas and coordinate map for one directory."""
+    sources = list_sources(directory)
+    if not sources:
+        raise ValueError(f"no PNG files in {directory}")
+
+    rows = math.ceil(len(sources) / columns)
+    sheet_w = columns * cell + (columns + 1) * PADDING
+    sheet_h = rows * (cell + LABEL_HEIGHT) + (rows + 1) * PADDING
+    atlas_w = columns * cell + (columns - 1) * ATLAS_GUTTER
+    atlas_h = rows * cell + (rows - 1) * ATLAS_GUTTER
+
+    sheet = np.empty((sheet_h, sheet_w, 3), dtype=np.uint8)
+    sheet[:] = SHEET_BACKGROUND
+    atlas = np.zeros((atlas_h, atlas_w, 4), dtype=np.uint8)
+    sprites = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        band_bytes = budget.per_worker(workers)
+        thumbs = pool.map(lambda p: np.asarray(thumbnail(p, cell, budget, band_bytes)), sources)
+        for i, (path, thumb) in enumerate(zip(sources, thumbs)):
+            sprites[os.path.relpath(path, BASE_DIR)] = paint_cell(sheet, atlas, i, path, thumb, columns, cell)
+            print(f"  [{i + 1}/{len(sources)}] {path.name}")
+
+    sheet_path, atlas_path, map_path = sheet_paths(directory)
+    atlas_map = {
+        "image": os.path.relpath(atlas_path, BASE_DIR),
+        "width": atlas_w,
+        "height": atlas_h,
+        "columns": columns,
+        "cell": cell,
+        "sprites": sprites,
+    }
+    save_sheets(directory, sheet, atlas, atlas_map)
+
+    print(f"  Saved: {sheet_path} ({sheet_w}x{sheet_h})")
+    print(f"  Saved: {atlas_path} ({atlas_w}x{atlas_h}) + {map_path.name}")
+    return atlas_map
+
+
+def update_sheets(directory: Path, changed: List[Path], budget: MemoryBudget) -> bool:
+    """Repaint only the cells for `changed` sources in existing sheets.
+
+    Returns False (and writes nothing) when the sheets are missing or the set of
+    sources has changed, in which case the caller should use build_sheets().
+    """
+    sheet_path, atlas_path, map_path = sheet_paths(directory)
+    if not (sheet_path.exists() and atlas_path.exists() and map_path.exists()):
+        return False
+    with open(map_path) as f:
+        atlas_map = json.load(f)
+    sources = list_sources(directory)
+    keys = [os.path.relpath(p, BASE_DIR) for p in sources]
+    if keys != list(atlas_map["sprites"]) or "columns" not in atlas_map:
+        return False
+
+    columns, cell = atlas_map["columns"], atlas_map["cell"]
+    sheet = np.array(Image.open(sheet_path).convert("RGB"))
+    atlas = np.array(Image.open(atlas_path).convert("RGBA"))
+    changed_keys = {os.path.relpath(p, BASE_DIR) for p in changed}
+    for i, (path, key) in enumerate(zip(sources, keys)):
+        if key in changed_keys:
+            thumb = np.asarray(thumbnail(path, cell, budget, budget.max_bytes))
+            atlas_map["sprites"][key] = paint_cell(sheet, atlas, i, path, thumb, columns, cell)
+    save_sheets(directory, sheet, atlas, atlas_map)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build contact sheets and sprite atlases for logo directories")
+    parser.add_argument("directories", nargs="*", type=Path, default=[BASE_DIR / "selected"],
+                        help="Directories to tile (default: selected/)")
+    parser.add_argument("--columns", type=int, default=6,
+                        help="Cells per row (default: 6)")
+    parser.add_argument("--cell", type=int, default=CELL_SIZE,
+                        help=f"Thumbnail size in px (default: {CELL_SIZE})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="Parallel decoders (default: CPU count)")
+    parser.add_argument("--max-memory-mb", type=int, default=DEFAULT_MAX_MEMORY_MB,
+                        help=f"Memory budget shared by all workers (default: {DEFAULT_MAX_MEMORY_MB})")
+    args = parser.parse_args()
+
+    budget = MemoryBudget.from_mb(args.max_memory_mb)
+    for directory in args.directories:
+        if not directory.is_dir():
+            print(f"Error: not a directory: {directory}")
+            sys.exit(1)
+
+        print(f"\n{'='*60}")
+        print(f"Contact sheet: {directory}")
+        print(f"{'='*60}")
+        try:
+            build_sheets(directory, args.columns, args.cell, args.workers, budget)
+        except ValueError as e:
+            print(f"  Error: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
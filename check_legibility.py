@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Vermillion Legibility Check — score how well each logo survives favicon sizes.
+
+STYLE_SUFFIX asks for a mark that "should work at small sizes" with a clearly
+legible 'VERMILLION'. This stage renders every logo at 128, 64, 32 and 16 px (on
+white) and scores what each smaller size loses against the 128 px render:
+  contrast      ← mean local (3x3) contrast over the pixels covering the mark's
+                  strokes (ink pixels on an edge), as a share of that at 128 px
+  edge_density  ← edge strength over the pixels covering ink, scaled by the
+                  size ratio so it counts edge length, as a share of 128 px
+
+Only ink is measured, so a mark is not rewarded for margin or penalized for a thin
+line on a large canvas. Thin strokes and small lettering blur into their
+neighbours as the size drops: stroke contrast falls and edges cancel out, while
+solid shapes keep both. Each size scores contrast x edge_density; the image score
+is the weighted mean, weighted towards the small sizes, scaled down for marks whose
+strokes are faint to begin with (stroke contrast at 128 px below STROKE_CONTRAST).
+Marks below --min-score are listed as failing.
+
+Sources are decoded and reduced in parallel from the raw cache (image_tiles.py),
+then every metric is computed in one vectorized pass per size over the whole
+batch. Scores are kept in sheets/legibility.json keyed by source path; entries
+whose source size and mtime are unchanged are reused.
+
+Usage:
+    python3 check_legibility.py                          # selected/
+    python3 check_legibility.py concepts/round3 selected --workers 8
+    python3 check_legibility.py concepts/round3 --min-score 0.6 --force
+
+Requires: pip3 install Pillow numpy
+"""
+
+import os
+import sys
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from PIL import Image
+import numpy as np
+
+from build_contact_sheet import list_sources, over_background
+from gallery_manifest import relpath
+from image_tiles import DEFAULT_MAX_MEMORY_MB, MemoryBudget, run_parallel, thumbnail
+
+BASE_DIR = Path(__file__).parent
+SCORES_PATH = BASE_DIR / "sheets" / "legibility.json"
+
+SCORES_VERSION = 2         # bump when the metrics change, so cached scores are recomputed
+SIZES = (128, 64, 32, 16)  # the first is the full-size reference
+SIZE_WEIGHTS = {64: 1.0, 32: 2.0, 16: 2.0}
+INK_DEPTH = 0.1            # luminance distance (0-1) from the background (median) that counts as ink
+EDGE_STEP = 0.1            # luminance step between neighbours that puts an ink pixel on a stroke edge
+STROKE_CONTRAST = 0.5      # full-size stroke contrast below this scales the score down linearly
+MIN_SCORE = 0.12           # just below the weakest mark in selected/ (r3-14, 0.14)
+LUMA = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+
+def render_sizes(path: Path, budget: MemoryBudget, band_bytes: int) -> Dict[int, np.ndarray]:
+    """Luminance (0-1) of the logo on white, square, at each of SIZES."""
+    thumb = thumbnail(path, max(SIZES), budget, band_bytes)
+    canvas = Image.new("RGB", (max(SIZES), max(SIZES)), (255, 255, 255))
+    rgb = Image.fromarray(over_background(np.asarray(thumb), (255, 255, 255)))
+    canvas.paste(rgb, ((canvas.width - rgb.width) // 2, (canvas.height - rgb.height) // 2))
+
+    rendered = {}
+    for size in SIZES:
+        img = canvas if size == canvas.width else canvas.resize((size, size), Image.LANCZOS)
+        rendered[size] = (np.asarray(img, dtype=np.float32) / 255.0) @ LUMA
+    return rendered
+
+
+def gradient(luma: np.ndarray) -> np.ndarray:
+    """Largest luminance step to the next pixel down or right, for an (n, s, s) stack."""
+    steps = np.zeros_like(luma)
+    steps[:, :-1, :] = np.abs(np.diff(luma, axis=1))
+    steps[:, :, :-1] = np.maximum(steps[:, :, :-1], np.abs(np.diff(luma, axis=2)))
+    return steps
+
+
+def local_contrast(luma: np.ndarray) -> np.ndarray:
+    """Max - min luminance over each pixel's 3x3 neighbourhood."""
+    size = luma.shape[1]
+    padded = np.pad(luma, ((0, 0), (1, 1), (1, 1)), mode="edge")
+    windows = np.stack([padded[:, y:y + size, x:x + size] for y in range(3) for x in range(3)])
+    return windows.max(axis=0) - windows.min(axis=0)
+
+
+def masked_mean(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    return (values * mask).sum(axis=(1, 2)) / np.maximum(mask.sum(axis=(1, 2)), 1)
+
+
+def covering(mask: np.ndarray, size: int) -> np.ndarray:
+    """Pixels at `size` that cover at least one masked full-size pixel."""
+    n, full = mask.shape[:2]
+    factor = full // size
+    return mask.reshape(n, size, factor, size, factor).any(axis=(2, 4))
+
+
+class Reference:
+    """Ink and stroke pixels of an (n, s, s) stack of full-size renders."""
+
+    def __init__(self, luma: np.ndarray):
+        background = np.median(luma.reshape(len(luma), -1), axis=1)[:, None, None]
+        steps = gradient(luma)
+        self.size = luma.shape[1]
+        self.ink = np.abs(luma - background) >= INK_DEPTH
+        self.stroke = self.ink & (steps >= EDGE_STEP)
+        self.contrast = masked_mean(local_contrast(luma), self.stroke)
+        self.edges = np.maximum((steps * self.ink).sum(axis=(1, 2)), 1e-6)
+
+
+def batch_metrics(luma: np.ndarray, reference: Reference) -> Dict[str, np.ndarray]:
+    """Contrast, edge density and score for an (n, s, s) stack, relative to the full-size stack."""
+    size = luma.shape[1]
+    contrast = masked_mean(local_contrast(luma), covering(reference.stroke, size))
+    contrast = np.minimum(contrast / np.maximum(reference.contrast, 1e-6), 1.0)
+
+    # Scale by the size ratio so a surviving edge counts for the same length as at full size
+    edges = (gradient(luma) * covering(reference.ink, size)).sum(axis=(1, 2)) * (reference.size / size)
+    density = np.minimum(edges / reference.edges, 1.0)
+    return {"contrast": contrast, "edge_density": density, "score": contrast * density}
+
+
+def score_images(paths: List[Path], workers: int, budget: MemoryBudget) -> Dict[str, dict]:
+    """Score entries for each readable path, keyed by relpath."""
+    band_bytes = budget.per_worker(workers)
+
+    def render(path: Path) -> Optional[Dict[int, np.ndarray]]:
+        try:
+            return render_sizes(path, budget, band_bytes)
+        except (OSError, ValueError) as e:
+            print(f"  FAILED: {path} ({e})")
+            return None
+
+    results = run_parallel(render, paths, workers)
+    paths = [p for p, r in zip(paths, results) if r is not None]
+    rendered = [r for r in results if r is not None]
+    if not rendered:
+        return {}
+
+    reference = Reference(np.stack([r[SIZES[0]] for r in rendered]))
+    per_size = {size: batch_metrics(np.stack([r[size] for r in rendered]), reference)
+                for size in SIZE_WEIGHTS}
+    total_weight = sum(SIZE_WEIGHTS.values())
+    faintness = np.minimum(reference.contrast / STROKE_CONTRAST, 1.0)
+
+    entries = {}
+    for i, path in enumerate(paths):
+        st = path.stat()
+        sizes = {str(size): {name: round(float(values[i]), 4) for name, values in per_size[size].items()}
+                 for size in SIZE_WEIGHTS}
+        score = sum(SIZE_WEIGHTS[size] * per_size[size]["score"][i] for size in SIZE_WEIGHTS) / total_weight
+        entries[relpath(path)] = {
+            "score": round(float(score * faintness[i]), 4),
+            "stroke_contrast": round(float(reference.contrast[i]), 4),
+            "sizes": sizes,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+    return entries
+
+
+def load_scores() -> dict:
+    """Cached scores, or an empty set if there are none or they used older metrics."""
+    if SCORES_PATH.exists():
+        with open(SCORES_PATH) as f:
+            scores = json.load(f)
+        if scores.get("version") == SCORES_VERSION:
+            return scores
+    return {"version": SCORES_VERSION, "images": {}}
+
+
+def save_scores(scores: dict) -> None:
+    """Write the scores file atomically."""
+    SCORES_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = SCORES_PATH.with_suffix(f".json.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(scores, f, indent=1, sort_keys=True)
+    tmp_path.replace(SCORES_PATH)
+
+
+def is_current(entry: Optional[dict], path: Path) -> bool:
+    if not entry:
+        return False
+    st = path.stat()
+    return entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns
+
+
+def update(scores: dict, paths: Iterable[Path], workers: int, budget: MemoryBudget,
+           force: bool = False) -> List[str]:
+    """Re-score changed paths (dropping ones that no longer exist). Returns changed keys."""
+    images = scores.setdefault("images", {})
+    changed = []
+    todo = []
+    for path in paths:
+        key = relpath(path)
+        if not path.exists():
+            if images.pop(key, None) is not None:
+                changed.append(key)
+        elif force or not is_current(images.get(key), path):
+            todo.append(path)
+    if todo:
+        fresh = score_images(todo, workers, budget)
+        images.update(fresh)
+        changed.extend(fresh)
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score logo legibility at favicon sizes")
+    parser.add_argument("directories", nargs="*", type=Path, default=[BASE_DIR / "selected"],
+                        help="Directories of PNGs (default: selected/)")
+    parser.add_argument("--min-score", type=float, default=MIN_SCORE,
+                        help=f"Scores below this are reported as illegible (default: {MIN_SCORE})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="Images decoded in parallel (default: CPU count)")
+    parser.add_argument("--max-memory-mb", type=int, default=DEFAULT_MAX_MEMORY_MB,
+                        help=f"Memory budget shared by all workers (default: {DEFAULT_MAX_MEMORY_MB})")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-score images even if they are unchanged")
+    args = parser.parse_args()
+
+    for directory in args.directories:
+        if not directory.is_dir():
+            print(f"Error: not a directory: {directory}")
+            sys.exit(1)
+
+    sources = [p for d in args.directories for p in list_sources(d)]
+    if not sources:
+        print("Error: no PNG files found")
+        sys.exit(1)
+
+    print(f"\n{'='*60}")
+    print(f"Legibility check: {len(sources)} images at {', '.join(f'{s}px' for s in SIZES)}")
+    print(f"{'='*60}")
+
+    scores = load_scores()
+    changed = update(scores, sources, args.workers, MemoryBudget.from_mb(args.max_memory_mb), args.force)
+    save_scores(scores)
+
+    failing = []
+    for path in sources:
+        entry = scores["images"].get(relpath(path))
+        if entry is None:
+            continue
+        small = entry["sizes"][str(min(SIZES))]
+        status = "ok" if entry["score"] >= args.min_score else "ILLEGIBLE"
+        if status != "ok":
+            failing.append(path)
+        print(f"  {entry['score']:.2f}  {path.name:<44} "
+              f"16px contrast {small['contrast']:.2f} edges {small['edge_density']:.2f}  {status}")
+
+    print(f"\n{'='*60}")
+    print(f"DONE: scored {len(changed)} new or changed, {len(failing)}/{len(sources)} below {args.min_score}")
+    print(f"Scores: {SCORES_PATH}")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Vermillion Brand-Asset Export — build the agency hand-off zip for selected logos.
+
+For each logo key (default: everything in selected/) the bundle contains:
+
+  <key>/original/<key>.png, <key>-4x.png            ← source renders, byte-for-byte
+  <key>/png/<key>-<variant>-<size>.png              ← color / transparent / dark
+  <key>/webp/<key>-<variant>-<size>.webp
+  <key>/jpg/<key>-color-<size>.jpg                  ← on white, for non-alpha uses
+  metadata.json                                      ← palette, files, hashes, dimensions
+
+Transparent and dark variants come from remove_background.py and are rebuilt first
+if they are missing or stale. Sizes are produced from the largest source by band-wise
+reduction (image_tiles.py) in parallel, and each encoded file is written straight
+into the zip as it completes; at most 2 x --workers logo variants are in flight,
+so memory does not grow with the bundle.
+
+Re-exporting to an existing bundle is incremental: a logo variant whose source hash
+and export settings are unchanged is copied from the old zip entry by entry instead
+of being re-rendered.
+
+Usage:
+    python3 export_bundle.py                                  # all of selected/
+    python3 export_bundle.py r3-11-clay-terre r3-20-hybrid-dual-tone
+    python3 export_bundle.py --sizes 32 64 512 --output exports/terre.zip --workers 8
+
+Requires: pip3 install Pillow numpy httpx
+"""
+
+import os
+import sys
+import argparse
+import hashlib
+import io
+import json
+import shutil
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+from PIL import Image
+import numpy as np
+
+import remove_background
+from generate_logo import BRAND_COLORS
+from gallery_manifest import file_sha256
+from image_tiles import (
+    DEFAULT_MAX_MEMORY_MB, MemoryBudget, downsample, image_info, raw_buffer,
+)
+
+BASE_DIR = Path(__file__).parent
+SOURCE_DIR = BASE_DIR / "selected"
+OUTPUT_PATH = BASE_DIR / "exports" / "vermillion-brand-assets.zip"
+
+SIZES = [64, 128, 256, 512, 1024, 2048]
+VARIANTS = ("color", "transparent", "dark")
+WEBP_QUALITY = 92
+JPEG_QUALITY = 92
+COPY_CHUNK = 1024 * 1024
+
+# Bumped whenever the way files are rendered changes, so old bundle entries are redone
+RENDER_VERSION = 1
+
+
+def logo_keys(source_dir: Path) -> List[str]:
+    """Logo keys in a directory: <key>.png and <key>-4x.png both map to <key>."""
+    keys = {p.stem[:-3] if p.stem.endswith("-4x") else p.stem for p in source_dir.glob("*.png")}
+    return sorted(keys)
+
+
+def variant_source(source_dir: Path, key: str, variant: str) -> Optional[Path]:
+    """Largest available PNG for a logo variant."""
+    folder = source_dir if variant == "color" else source_dir / variant
+    for name in (f"{key}-4x.png", f"{key}.png"):
+        if (folder / name).exists():
+            return folder / name
+    return None
+
+
+def originals(source_dir: Path, key: str) -> List[Path]:
+    return [p for p in (source_dir / f"{key}.png", source_dir / f"{key}-4x.png") if p.exists()]
+
+
+def recipe(sizes: List[int]) -> dict:
+    return {"render_version": RENDER_VERSION, "sizes": sizes,
+            "webp_quality": WEBP_QUALITY, "jpeg_quality": JPEG_QUALITY}
+
+
+def resized(src: np.ndarray, size: int, band_bytes: int) -> Image.Image:
+    """RGBA image fitting size x size, box-reduced band by band before resampling."""
+    height, width = src.shape[:2]
+    scale = size / max(width, height)
+    target = (max(1, round(width * scale)), max(1, round(height * scale)))
+    factor = max(1, int(1 / scale) // 2)
+    if factor > 1:
+        img = Image.fromarray(downsample(src, factor, band_bytes))
+    else:
+        # Resample straight from the mapped pages rather than copying the source
+        img = Image.frombuffer("RGBA", (width, height), np.ascontiguousarray(src), "raw", "RGBA", 0, 1)
+    return img.resize(target, Image.LANCZOS) if img.size != target else img
+
+
+def encode(img: Image.Image, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "png":
+        img.save(buf, "PNG", optimize=True)
+    elif fmt == "webp":
+        img.save(buf, "WEBP", quality=WEBP_QUALITY, method=4)
+    elif fmt == "jpg":
+        flat = Image.new("RGB", img.size, (255, 255, 255))
+        flat.paste(img, mask=img.getchannel("A"))
+        flat.save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def render_variant(source: Path, key: str, variant: str, sizes: List[int],
+                   budget: MemoryBudget, band_bytes: int) -> List[Tuple[str, bytes]]:
+    """Encode every size and format for one logo variant. Returns (arcname, data) pairs."""
+    width, height, _ = image_info(source)
+    src = raw_buffer(source, budget)
+    files = []
+    for size in sizes:
+        if size > max(width, height):
+            continue
+        img = resized(src, size, band_bytes)
+        stem = f"{key}-{variant}-{size}"
+        files.append((f"{key}/png/{stem}.png", encode(img, "png")))
+        files.append((f"{key}/webp/{stem}.webp", encode(img, "webp")))
+        if variant == "color":
+            files.append((f"{key}/jpg/{stem}.jpg", encode(img, "jpg")))
+    return files
+
+
+def file_record(arcname: str, data: bytes) -> dict:
+    record = {"path": arcname, "bytes": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+    if arcname.endswith((".png", ".webp", ".jpg")):
+        with Image.open(io.BytesIO(data)) as img:
+            record["width"], record["height"] = img.size
+    return record
+
+
+def zip_info(arcname: str) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+    # Images are already compressed; deflate only the JSON
+    info.compress_type = zipfile.ZIP_DEFLATED if arcname.endswith(".json") else zipfile.ZIP_STORED
+    info.external_attr = 0o644 << 16
+    return info
+
+
+class BundleWriter:
+    """Streams entries into a zip, copying unchanged ones from a previous bundle."""
+
+    def __init__(self, path: Path, previous: Optional[Path]):
+        self.tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        self.path = path
+        self.zip = zipfile.ZipFile(self.tmp_path, "w", allowZip64=True)
+        self.previous = zipfile.ZipFile(previous) if previous else None
+
+    def write(self, arcname: str, data: bytes) -> dict:
+        with self.zip.open(zip_info(arcname), "w", force_zip64=len(data) > 2**31) as dst:
+            dst.write(data)
+        return file_record(arcname, data)
+
+    def write_file(self, arcname: str, path: Path) -> dict:
+        """Stream a file from disk (originals) without reading it into memory."""
+        with open(path, "rb") as src, self.zip.open(zip_info(arcname), "w", force_zip64=True) as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK)
+        with Image.open(path) as img:
+            width, height = img.size
+        return {"path": arcname, "bytes": path.stat().st_size, "sha256": file_sha256(path),
+                "width": width, "height": height}
+
+    def copy_previous(self, record: dict) -> None:
+        with self.previous.open(record["path"]) as src, \
+                self.zip.open(zip_info(record["path"]), "w", force_zip64=True) as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK)
+
+    def commit(self) -> None:
+        self.zip.close()
+        if self.previous:
+            self.previous.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        self.zip.close()
+        if self.previous:
+            self.previous.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+
+def load_previous(path: Path) -> Tuple[Optional[Path], dict]:
+    """(bundle path, metadata) of an existing bundle, or (None, {}) if unusable."""
+    if not path.exists():
+        return None, {}
+    try:
+        with zipfile.ZipFile(path) as zf:
+            names = set(zf.namelist())
+            metadata = json.loads(zf.read("metadata.json"))
+    except (zipfile.BadZipFile, KeyError, json.JSONDecodeError):
+        return None, {}
+    # Drop any variant whose files aren't all present
+    for logo in metadata.get("logos", {}).values():
+        for variant, entry in list(logo.get("variants", {}).items()):
+            if any(f["path"] not in names for f in entry["files"]):
+                del logo["variants"][variant]
+    return path, metadata
+
+
+def bounded_map(pool: ThreadPoolExecutor, fn, jobs: List[tuple], window: int) -> Iterator[Tuple[tuple, object]]:
+    """Yield (job, result) as they complete, with at most `window` jobs in flight."""
+    jobs = iter(jobs)
+    running = {}
+    for job in jobs:
+        running[pool.submit(fn, *job)] = job
+        if len(running) >= window:
+            break
+    while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            job = running.pop(future)
+            yield job, future.result()
+            nxt = next(jobs, None)
+            if nxt is not None:
+                running[pool.submit(fn, *nxt)] = nxt
+
+
+def export(keys: List[str], source_dir: Path, output: Path, sizes: List[int],
+           workers: int, budget: MemoryBudget) -> dict:
+    """Build (or incrementally update) the bundle. Returns its metadata."""
+    band_bytes = budget.per_worker(workers)
+    settings = recipe(sizes)
+    previous_path, previous = load_previous(output)
+    if previous.get("recipe") != settings:
+        previous_path, previous = None, {}
+
+    # Variants must exist before they can be exported
+    stale = [p for key in keys for p in originals(source_dir, key) if remove_background.is_stale(p)]
+    if stale:
+        print(f"  Building transparent/dark variants for {len(stale)} source(s)...")
+        dark_ink = np.asarray(remove_background.hex_to_rgb(remove_background.DARK_INK), dtype=np.uint8)
+
+        def build_variants(path: Path) -> None:
+            try:
+                remove_background.process_image(path, budget, band_bytes, remove_background.SOFTNESS, dark_ink)
+            except (OSError, ValueError) as e:
+                print(f"  FAILED: {path} ({e})")
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(build_variants, stale))
+
+    metadata = {
+        "name": "Vermillion brand assets",
+        "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "palette": BRAND_COLORS,
+        "recipe": settings,
+        "logos": {},
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    writer = BundleWriter(output, previous_path)
+    copied = rendered = 0
+    try:
+        jobs, entries = [], {}
+        for key in keys:
+            logo = metadata["logos"].setdefault(key, {"originals": [], "variants": {}})
+            for path in originals(source_dir, key):
+                logo["originals"].append(writer.write_file(f"{key}/original/{path.name}", path))
+            old_variants = previous.get("logos", {}).get(key, {}).get("variants", {})
+            for variant in VARIANTS:
+                source = variant_source(source_dir, key, variant)
+                if source is None:
+                    continue
+                entry = {"source": os.path.relpath(source, BASE_DIR), "source_sha256": file_sha256(source)}
+                old = old_variants.get(variant)
+                if old and old["source_sha256"] == entry["source_sha256"]:
+                    for record in old["files"]:
+                        writer.copy_previous(record)
+                    logo["variants"][variant] = old
+                    copied += 1
+                else:
+                    jobs.append((source, key, variant, sizes, budget, band_bytes))
+                    entries[key, variant] = entry
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for job, files in bounded_map(pool, render_variant, jobs, 2 * workers):
+                _, key, variant = job[:3]
+                entry = entries[key, variant]
+                entry["files"] = [writer.write(arcname, data) for arcname, data in files]
+                metadata["logos"][key]["variants"][variant] = entry
+                rendered += 1
+                print(f"  {key} [{variant}] {len(files)} files")
+
+        writer.write("metadata.json", json.dumps(metadata, indent=2).encode())
+        writer.commit()
+    except BaseException:
+        writer.abort()
+        raise
+
+    print(f"  Rendered {rendered} variant(s), reused {copied} from the previous bundle")
+    return metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a brand-asset zip for selected logos")
+    parser.add_argument("keys", nargs="*",
+                        help="Logo keys (e.g. r3-11-clay-terre); default: all of selected/")
+    parser.add_argument("--source-dir", type=Path, default=SOURCE_DIR,
+                        help="Where the logos live (default: selected/)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH,
+                        help=f"Bundle path (default: {os.path.relpath(OUTPUT_PATH, BASE_DIR)})")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help=f"Square sizes in px (default: {' '.join(map(str, SIZES))})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="Parallel renderers (default: CPU count)")
+    parser.add_argument("--max-memory-mb", type=int, default=DEFAULT_MAX_MEMORY_MB,
+                        help=f"Memory budget shared by all workers (default: {DEFAULT_MAX_MEMORY_MB})")
+    args = parser.parse_args()
+
+    available = logo_keys(args.source_dir)
+    keys = args.keys or available
+    missing = [k for k in keys if k not in available]
+    if missing:
+        print(f"Error: not found in {args.source_dir}: {', '.join(missing)}")
+        sys.exit(1)
+
+    print(f"\n{'='*60}")
+    print(f"Exporting {len(keys)} logo(s) to {args.output}")
+    print(f"{'='*60}")
+    start = time.time()
+    export(keys, args.source_dir, args.output, sorted(set(args.sizes)), args.workers,
+           MemoryBudget.from_mb(args.max_memory_mb))
+    print(f"\nDONE: {args.output} ({args.output.stat().st_size / 1e6:.1f} MB, {time.time() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Vermillion Gallery Manifest — content hashes for every gallery image.
+
+sheets/manifest.json maps each PNG under selected/ and concepts/ (including the
+transparent/ and dark/ variant folders) to its SHA-256, size and dimensions:
+
+    {"files": {"selected/r3-11-clay-terre.png":
+                   {"sha256": "...", "size": 812345, "mtime_ns": ..., "width": 1024, "height": 1024},
+               ...}}
+
+Entries whose size and mtime are unchanged are reused rather than re-hashed, and
+update() touches only the paths it is given, so keeping the manifest current after
+a new render costs one hash. Files are hashed in chunks (constant memory).
+
+Usage:
+    python3 gallery_manifest.py              # refresh selected/ and concepts/
+    python3 gallery_manifest.py --rebuild    # re-hash everything
+
+Requires: pip3 install Pillow
+"""
+
+import os
+import sys
+import argparse
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from PIL import Image
+
+BASE_DIR = Path(__file__).parent
+MANIFEST_PATH = BASE_DIR / "sheets" / "manifest.json"
+GALLERY_DIRS = [BASE_DIR / "selected", BASE_DIR / "concepts"]
+
+HASH_CHUNK = 1024 * 1024
+
+
+def relpath(path: Path) -> str:
+    """Manifest key for a path: relative to the repo, forward slashes."""
+    return Path(os.path.relpath(path, BASE_DIR)).as_posix()
+
+
+def gallery_files(directories: Iterable[Path] = GALLERY_DIRS) -> List[Path]:
+    """Every PNG under the gallery directories, recursively."""
+    return sorted(p for d in directories if d.is_dir() for p in d.rglob("*.png"))
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_entry(path: Path, previous: Optional[dict] = None) -> Optional[dict]:
+    """Manifest entry for one file, reusing `previous` if size and mtime match.
+
+    Returns None (and logs) if the file can't be read as an image.
+    """
+    try:
+        st = path.stat()
+        if previous and previous.get("size") == st.st_size and previous.get("mtime_ns") == st.st_mtime_ns:
+            return previous
+        with Image.open(path) as img:
+            width, height = img.size
+    except OSError as e:
+        print(f"  Skipping unreadable image: {path} ({e})")
+        return None
+    return {
+        "sha256": file_sha256(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "width": width,
+        "height": height,
+    }
+
+
+def load_manifest() -> dict:
+    if MANIFEST_PATH.exists():
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    return {"files": {}}
+
+
+def save_manifest(manifest: dict) -> None:
+    """Write the manifest atomically."""
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = MANIFEST_PATH.with_suffix(f".json.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    tmp_path.replace(MANIFEST_PATH)
+
+
+def update(manifest: dict, paths: Iterable[Path]) -> Dict[str, Optional[dict]]:
+    """Refresh entries for the given paths (dropping ones that no longer exist).
+
+    Returns the changed entries by key; None marks a removal. Unreadable files are
+    dropped like missing ones.
+    """
+    files = manifest.setdefault("files", {})
+    changed = {}
+    for path in paths:
+        key = relpath(path)
+        entry = file_entry(path, files.get(key)) if path.exists() else None
+        if entry is None:
+            if files.pop(key, None) is not None:
+                changed[key] = None
+            continue
+        if entry is not files.get(key):
+            files[key] = entry
+            changed[key] = entry
+    return changed
+
+
+def refresh(directories: Iterable[Path] = GALLERY_DIRS, rebuild: bool = False) -> dict:
+    """Bring the manifest in line with the gallery directories and save it."""
+    manifest = {"files": {}} if rebuild else load_manifest()
+    current = gallery_files(directories)
+    known = {BASE_DIR / key for key in manifest.get("files", {})}
+    update(manifest, set(current) | known)
+    save_manifest(manifest)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the gallery content-hash manifest")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Re-hash every file instead of reusing unchanged entries")
+    args = parser.parse_args()
+
+    manifest = refresh(rebuild=args.rebuild)
+    if not manifest["files"]:
+        print("Error: no gallery images found")
+        sys.exit(1)
+    print(f"Manifest: {MANIFEST_PATH} ({len(manifest['files'])} files)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,26 +4,30 @@ Vermillion Logo Generator — Generate logo concepts using OpenAI gpt-image-1.
 
 Generates logo design concepts for Vermillion master-planned community
 across 4 distinct creative directions. Uses the OpenAI image generation API.
+With several keys in OPENAI_API_KEYS, variations are generated in parallel
+across the key pool (see key_pool.py).
 
 Usage:
     OPENAI_API_KEY="sk-..." python3 generate_logo.py --concept 1 --variations 3
     OPENAI_API_KEY="sk-..." python3 generate_logo.py --all --variations 3
     OPENAI_API_KEY="sk-..." python3 generate_logo.py --concept 2 --variations 1 --quality medium
+    OPENAI_API_KEYS="sk-aaa,sk-bbb:org-123" python3 generate_logo.py --all --variations 10
 
 Requires: pip3 install Pillow httpx
 """
 
-import os
 import sys
 import argparse
 import base64
-import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 from PIL import Image
 import io
 import httpx
 
+from key_pool import KeyPool, KeyPoolExhausted
+
 # --- Configuration ---
 
 API_URL = "https://api.openai.com/v1/images/generations"
@@ -168,12 +172,8 @@ CONCEPT_PROMPTS = {
 }
 
 
-def generate_image(api_key: str, prompt: str, size: str = "1024x1024", quality: str = "high") -> Optional[bytes]:
+def generate_image(pool: KeyPool, prompt: str, size: str = "1024x1024", quality: str = "high") -> Optional[bytes]:
     """Call OpenAI image generation API and return PNG bytes."""
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-    }
-
     payload = {
         "model": MODEL,
         "prompt": prompt,
@@ -187,24 +187,30 @@ def generate_image(api_key: str, prompt: str, size: str = "1024x1024", quality:
 
     with httpx.Client(timeout=120.0) as client:
         try:
-            response = client.post(API_URL, headers=headers, json=payload)
+            response = pool.post(client, API_URL, json=payload)
             response.raise_for_status()
         except httpx.HTTPStatusError as e:
             error_body = e.response.text
             print(f"  API error ({e.response.status_code}): {error_body[:300]}")
-            if MODEL != FALLBACK_MODEL:
+            if MODEL != FALLBACK_MODEL and pool.live():
                 print(f"  Trying fallback model: {FALLBACK_MODEL}...")
                 payload["model"] = FALLBACK_MODEL
                 payload.pop("output_format", None)
                 payload["response_format"] = "b64_json"
                 try:
-                    response = client.post(API_URL, headers=headers, json=payload)
+                    response = pool.post(client, API_URL, json=payload)
                     response.raise_for_status()
                 except httpx.HTTPStatusError as e2:
                     print(f"  Fallback also failed ({e2.response.status_code}): {e2.response.text[:300]}")
                     return None
+                except KeyPoolExhausted as e2:
+                    print(f"  Fallback also failed: {e2}")
+                    return None
             else:
                 return None
+        except KeyPoolExhausted as e:
+            print(f"  API error: {e}")
+            return None
 
     data = response.json()
 
@@ -234,8 +240,8 @@ def save_image(image_bytes: bytes, output_path: Path) -> None:
     print(f"  Saved: {output_path} ({img.size[0]}x{img.size[1]})")
 
 
-def run_concept(api_key: str, concept_id: int, variations: int, quality: str, size: str, base_dir: Path) -> int:
-    """Generate variations for a single concept. Returns count of successful generations."""
+def plan_concept(concept_id: int, variations: int, base_dir: Path) -> Tuple[List[Tuple[Path, str]], int]:
+    """Variations still to generate for a concept as (output path, prompt), and the count already on disk."""
     concept = CONCEPT_PROMPTS[concept_id]
     output_dir = base_dir / CONCEPT_DIRS[concept_id]
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -246,7 +252,8 @@ def run_concept(api_key: str, concept_id: int, variations: int, quality: str, si
     print(f"Generating {variations} variation(s)...")
     print(f"{'='*60}")
 
-    success_count = 0
+    jobs = []
+    existing = 0
 
     for i in range(1, variations + 1):
         # Check if already exists
@@ -254,12 +261,10 @@ def run_concept(api_key: str, concept_id: int, variations: int, quality: str, si
         output_path = output_dir / filename
 
         if output_path.exists():
-            print(f"\n  [{i}/{variations}] Skipping (already exists): {filename}")
-            success_count += 1
+            print(f"  [{i}/{variations}] Skipping (already exists): {filename}")
+            existing += 1
             continue
 
-        print(f"\n  [{i}/{variations}] Generating {filename}...")
-
         # Add variation seed to prompt for diversity
         variation_suffix = ""
         if i > 1:
@@ -272,21 +277,21 @@ def run_concept(api_key: str, concept_id: int, variations: int, quality: str, si
             ]
             variation_suffix = variation_hints[(i - 2) % len(variation_hints)]
 
-        prompt = concept["prompt"] + variation_suffix
+        jobs.append((output_path, concept["prompt"] + variation_suffix))
 
-        image_bytes = generate_image(api_key, prompt, size=size, quality=quality)
+    return jobs, existing
 
-        if image_bytes:
-            save_image(image_bytes, output_path)
-            success_count += 1
-        else:
-            print(f"  FAILED to generate {filename}")
 
-        # Rate limiting — small pause between calls
-        if i < variations:
-            time.sleep(1)
+def run_job(pool: KeyPool, output_path: Path, prompt: str, quality: str, size: str) -> bool:
+    """Generate and save one variation. Returns True on success."""
+    print(f"\n  Generating {output_path.parent.name}/{output_path.name}...")
+    image_bytes = generate_image(pool, prompt, size=size, quality=quality)
 
-    return success_count
+    if image_bytes:
+        save_image(image_bytes, output_path)
+        return True
+    print(f"  FAILED to generate {output_path}")
+    return False
 
 
 def main():
@@ -320,23 +325,33 @@ def main():
         print("\nError: specify --concept N or --all")
         sys.exit(1)
 
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        print("Error: OPENAI_API_KEY environment variable not set")
+    try:
+        pool = KeyPool.from_env()
+    except ValueError as e:
+        print(f"Error: {e}")
         print("Usage: OPENAI_API_KEY='sk-...' python3 generate_logo.py --concept 1")
         sys.exit(1)
 
     concepts_to_run = list(range(1, 5)) if args.all else [args.concept]
+    jobs = []
     total_success = 0
     total_attempted = 0
 
     for cid in concepts_to_run:
-        count = run_concept(api_key, cid, args.variations, args.quality, args.size, base_dir)
-        total_success += count
+        concept_jobs, existing = plan_concept(cid, args.variations, base_dir)
+        jobs.extend(concept_jobs)
+        total_success += existing
         total_attempted += args.variations
 
+    # One pool-wide queue so every key stays busy across concepts
+    print(f"\nDispatching {len(jobs)} request(s) across {len(pool.keys)} key(s)...")
+    with ThreadPoolExecutor(max_workers=pool.workers) as executor:
+        results = executor.map(lambda job: run_job(pool, *job, args.quality, args.size), jobs)
+        total_success += sum(results)
+
     print(f"\n{'='*60}")
     print(f"DONE: {total_success}/{total_attempted} images generated successfully")
+    print(pool.summary())
     print(f"{'='*60}")
 
 
@@ -11,20 +11,24 @@ Key learnings from rounds 1-2:
 - Warm earth tones — terracotta, cream, deep brown, muted vermillion
 - Think "Sur La Terre", "Louve", "Ever House", "Golden Oaks", "Novaterra"
 
+Prompts are generated in parallel across the keys in OPENAI_API_KEYS (see key_pool.py).
+
 Usage:
     OPENAI_API_KEY="sk-..." python3 generate_round3.py
+    OPENAI_API_KEYS="sk-aaa,sk-bbb:org-123" python3 generate_round3.py r3-01 r3-02
 """
 
-import os
 import sys
 import base64
-import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 from PIL import Image
 import io
 import httpx
 
+from key_pool import KeyPool, KeyPoolExhausted
+
 API_URL = "https://api.openai.com/v1/images/generations"
 MODEL = "gpt-image-1"
 FALLBACK_MODEL = "dall-e-3"
@@ -340,9 +344,8 @@ PROMPTS = {
 }
 
 
-def generate_image(api_key: str, prompt: str, size: str = "1024x1024", quality: str = "high") -> Optional[bytes]:
+def generate_image(pool: KeyPool, prompt: str, size: str = "1024x1024", quality: str = "high") -> Optional[bytes]:
     """Call OpenAI image generation API and return PNG bytes."""
-    headers = {"Authorization": f"Bearer {api_key}"}
     payload = {
         "model": MODEL,
         "prompt": prompt,
@@ -356,24 +359,30 @@ def generate_image(api_key: str, prompt: str, size: str = "1024x1024", quality:
 
     with httpx.Client(timeout=180.0) as client:
         try:
-            response = client.post(API_URL, headers=headers, json=payload)
+            response = pool.post(client, API_URL, json=payload)
             response.raise_for_status()
         except httpx.HTTPStatusError as e:
             error_body = e.response.text
             print(f"  API error ({e.response.status_code}): {error_body[:300]}")
-            if MODEL != FALLBACK_MODEL:
+            if MODEL != FALLBACK_MODEL and pool.live():
                 print(f"  Trying fallback: {FALLBACK_MODEL}...")
                 payload["model"] = FALLBACK_MODEL
                 payload.pop("output_format", None)
                 payload["response_format"] = "b64_json"
                 try:
-                    response = client.post(API_URL, headers=headers, json=payload)
+                    response = pool.post(client, API_URL, json=payload)
                     response.raise_for_status()
                 except httpx.HTTPStatusError as e2:
                     print(f"  Fallback failed ({e2.response.status_code}): {e2.response.text[:300]}")
                     return None
+                except KeyPoolExhausted as e2:
+                    print(f"  Fallback failed: {e2}")
+                    return None
             else:
                 return None
+        except KeyPoolExhausted as e:
+            print(f"  API error: {e}")
+            return None
 
     data = response.json()
     if "data" in data and len(data["data"]) > 0:
@@ -390,10 +399,28 @@ def generate_image(api_key: str, prompt: str, size: str = "1024x1024", quality:
     return None
 
 
+def generate_key(pool: KeyPool, key: str) -> bool:
+    """Generate and save one prompt. Returns True on success."""
+    output_path = OUTPUT_DIR / f"{key}.png"
+    print(f"\nGenerating: {key}")
+    image_bytes = generate_image(pool, PROMPTS[key])
+
+    if image_bytes:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, "wb") as f:
+            f.write(image_bytes)
+        img = Image.open(io.BytesIO(image_bytes))
+        print(f"  Saved: {output_path} ({img.size[0]}x{img.size[1]})")
+        return True
+    print(f"  FAILED: {key}")
+    return False
+
+
 def main():
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        print("Error: OPENAI_API_KEY not set")
+    try:
+        pool = KeyPool.from_env()
+    except ValueError as e:
+        print(f"Error: {e}")
         sys.exit(1)
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -407,42 +434,31 @@ def main():
             for k in PROMPTS.keys():
                 if arg in k:
                     keys_to_run.append(k)
+        # Several args can match the same prompt; queue each once
+        keys_to_run = list(dict.fromkeys(keys_to_run))
 
     total = len(keys_to_run)
     success = 0
+    pending = []
 
     for i, key in enumerate(keys_to_run, 1):
-        filename = f"{key}.png"
-        output_path = OUTPUT_DIR / filename
-
-        if output_path.exists():
-            print(f"\n[{i}/{total}] SKIP (exists): {filename}")
-            success += 1
-            continue
-
-        print(f"\n{'='*60}")
-        print(f"[{i}/{total}] Generating: {key}")
-        print(f"{'='*60}")
-
-        image_bytes = generate_image(api_key, PROMPTS[key])
-
-        if image_bytes:
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(output_path, "wb") as f:
-                f.write(image_bytes)
-            img = Image.open(io.BytesIO(image_bytes))
-            print(f"  Saved: {output_path} ({img.size[0]}x{img.size[1]})")
+        if (OUTPUT_DIR / f"{key}.png").exists():
+            print(f"[{i}/{total}] SKIP (exists): {key}.png")
             success += 1
         else:
-            print(f"  FAILED: {key}")
+            pending.append(key)
+
+    print(f"\n{'='*60}")
+    print(f"Generating {len(pending)} logo(s) across {len(pool.keys)} key(s)")
+    print(f"{'='*60}")
 
-        # Rate limit pause
-        if i < total:
-            time.sleep(1.5)
+    with ThreadPoolExecutor(max_workers=pool.workers) as executor:
+        success += sum(executor.map(lambda key: generate_key(pool, key), pending))
 
     print(f"\n{'='*60}")
     print(f"DONE: {success}/{total} logos generated")
     print(f"Output: {OUTPUT_DIR}")
+    print(pool.summary())
     print(f"{'='*60}")
 
 
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Vermillion Image Tiles — memory-bounded access to large (4x) logo images.
+
+A 4096x4096 RGBA -4x image is ~64 MB decoded. Instead of holding whole images per
+worker, the image stages work on memory-mapped raw buffers in row bands:
+
+  - raw_buffer() decodes a large PNG once into .cache/raw/<path>-<version>.npy and
+    returns a read-only np.memmap. Later passes page rows in from disk and never
+    decode again; a new version of a file evicts the old entry. Images small enough
+    to decode cheaply (the 1024 px bases) are decoded in memory instead of cached.
+    PNG decoding itself needs the full image, so decodes reserve their size from a
+    shared MemoryBudget and large ones are serialized rather than run side by side.
+  - iter_bands() walks an array in row bands no larger than a byte cap.
+  - downsample() box-reduces an image band by band, so thumbnails of 4x sources
+    never materialize the full image in RAM.
+  - save_png() encodes straight from a (memory-mapped) array without a copy.
+
+Peak memory per worker is therefore capped by --max-memory-mb / --workers for
+stage work, regardless of image size.
+
+Usage:
+    python3 image_tiles.py warm selected concepts/round3 --workers 8 --max-memory-mb 512
+    python3 image_tiles.py clean
+    python3 image_tiles.py clean --max-size-mb 1024     # drop least recently used entries
+
+Requires: pip3 install Pillow numpy
+"""
+
+import os
+import sys
+import argparse
+import hashlib
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from PIL import Image
+import numpy as np
+
+BASE_DIR = Path(__file__).parent
+RAW_CACHE_DIR = BASE_DIR / ".cache" / "raw"
+
+DEFAULT_MAX_MEMORY_MB = 512
+MIN_BAND_ROWS = 8
+CACHE_MIN_BYTES = 16 * 1024 * 1024   # decoded size below which images aren't cached
+
+
+class MemoryBudget:
+    """A shared byte budget. Workers reserve() what they are about to allocate."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.available = max_bytes
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_mb(cls, max_mb: int) -> "MemoryBudget":
+        return cls(max_mb * 1024 * 1024)
+
+    @contextmanager
+    def reserve(self, nbytes: int):
+        """Block until nbytes are free. Requests above the cap get the whole budget."""
+        nbytes = min(nbytes, self.max_bytes)
+        with self._cond:
+            self._cond.wait_for(lambda: self.available >= nbytes)
+            self.available -= nbytes
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.available += nbytes
+                self._cond.notify_all()
+
+    def per_worker(self, workers: int) -> int:
+        """Band byte cap for each of `workers` concurrent stage workers."""
+        return max(1, self.max_bytes // max(1, workers))
+
+
+def image_info(path: Path) -> Tuple[int, int, str]:
+    """(width, height, mode) from the PNG header, without decoding pixels."""
+    with Image.open(path) as img:
+        return img.size[0], img.size[1], img.mode
+
+
+def decoded_size(path: Path) -> int:
+    """Bytes needed to hold the image as RGBA."""
+    width, height, _ = image_info(path)
+    return width * height * 4
+
+
+def _cache_prefix(path: Path) -> str:
+    return hashlib.sha1(str(path.resolve()).encode()).hexdigest()[:16]
+
+
+def _cache_path(path: Path) -> Path:
+    st = path.stat()
+    version = hashlib.sha1(f"{st.st_mtime_ns}:{st.st_size}".encode()).hexdigest()[:16]
+    return RAW_CACHE_DIR / f"{_cache_prefix(path)}-{version}.npy"
+
+
+def raw_buffer(path: Path, budget: Optional[MemoryBudget] = None) -> np.ndarray:
+    """Return the image as a read-only (h, w, 4) uint8 array.
+
+    Images of at least CACHE_MIN_BYTES decoded come back as a memmap of the raw
+    cache, decoding on first use; smaller ones are decoded into memory each time.
+    """
+    if decoded_size(path) < CACHE_MIN_BYTES:
+        reservation = budget.reserve(decoded_size(path)) if budget else nullcontext()
+        with reservation, Image.open(path) as img:
+            array = np.asarray(img.convert("RGBA"))
+        array.flags.writeable = False
+        return array
+
+    cache_path = _cache_path(path)
+    if cache_path.exists():
+        os.utime(cache_path)   # recency for clean --max-size-mb
+    else:
+        RAW_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        reservation = budget.reserve(decoded_size(path)) if budget else nullcontext()
+        with reservation, Image.open(path) as img:
+            img.load()
+            width, height = img.size
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8,
+                                            shape=(height, width, 4))
+            # Copy out in strips so the only full-size allocation is the decode itself
+            rows = band_rows(width, 4, 8 * 1024 * 1024, bytes_per_value=1)
+            for y0 in range(0, height, rows):
+                strip = img.crop((0, y0, width, min(height, y0 + rows)))
+                out[y0:y0 + strip.size[1]] = np.asarray(strip.convert("RGBA"))
+            out.flush()
+            del out
+        os.replace(tmp_path, cache_path)
+        # Older versions of the same file are never read again (open maps stay valid)
+        for stale in RAW_CACHE_DIR.glob(f"{_cache_prefix(path)}-*.npy"):
+            if stale != cache_path:
+                stale.unlink(missing_ok=True)
+    return np.load(cache_path, mmap_mode="r")
+
+
+def prune_cache(max_bytes: int) -> Tuple[int, int]:
+    """Delete least recently used cache entries until the cache fits in max_bytes.
+
+    Returns (entries removed, bytes freed). Scratch buffers are left alone.
+    """
+    entries = []
+    for entry in RAW_CACHE_DIR.glob("*.npy"):
+        if entry.name.startswith("out-"):
+            continue
+        st = entry.stat()
+        entries.append((st.st_mtime, st.st_size, entry))
+    total = sum(size for _, size, _ in entries)
+    removed = freed = 0
+    for _, size, entry in sorted(entries):
+        if total - freed <= max_bytes:
+            break
+        entry.unlink(missing_ok=True)
+        removed += 1
+        freed += size
+    return removed, freed
+
+
+def create_buffer(shape: Tuple[int, ...], name: str) -> np.memmap:
+    """A writable scratch memmap in the cache directory, for stage outputs."""
+    RAW_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = RAW_CACHE_DIR / f"out-{name}-{os.getpid()}-{threading.get_ident()}.npy"
+    return np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=shape)
+
+
+def release_buffer(array: np.memmap) -> None:
+    """Delete a scratch buffer made by create_buffer()."""
+    filename = getattr(array, "filename", None)
+    array.flush()
+    del array
+    if filename and Path(filename).parent == RAW_CACHE_DIR.resolve():
+        Path(filename).unlink(missing_ok=True)
+
+
+def band_rows(width: int, channels: int, max_bytes: int, multiple: int = 1,
+              bytes_per_value: int = 4) -> int:
+    """Rows per band so a float32 working copy of the band stays within max_bytes."""
+    row_bytes = width * channels * bytes_per_value
+    rows = max(MIN_BAND_ROWS, max_bytes // max(1, row_bytes))
+    return max(multiple, rows - rows % multiple)
+
+
+def iter_bands(array: np.ndarray, max_bytes: int, multiple: int = 1) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """Yield (y0, y1, view) row bands of an (h, w, c) array."""
+    height, width = array.shape[:2]
+    channels = array.shape[2] if array.ndim == 3 else 1
+    rows = band_rows(width, channels, max_bytes, multiple)
+    for y0 in range(0, height, rows):
+        y1 = min(height, y0 + rows)
+        yield y0, y1, array[y0:y1]
+
+
+def downsample(array: np.ndarray, factor: int, max_bytes: int) -> np.ndarray:
+    """Reduce an (h, w, 4) array by an integer factor, one row band at a time.
+
+    Each band is wrapped (not copied) as a Pillow image and box-reduced in C, so
+    only the small reduced rows are ever allocated.
+    """
+    if factor <= 1:
+        return np.array(array)
+    height, width, _ = array.shape
+    rows = band_rows(width, 4, max_bytes, multiple=factor, bytes_per_value=1)
+    reduced = []
+    for y0 in range(0, height, rows):
+        y1 = min(height, y0 + rows)
+        band = np.ascontiguousarray(array[y0:y1])
+        img = Image.frombuffer("RGBA", (width, y1 - y0), band, "raw", "RGBA", 0, 1)
+        reduced.append(np.asarray(img.reduce(factor)))
+    return np.concatenate(reduced)
+
+
+def thumbnail(path: Path, box: int, budget: Optional[MemoryBudget] = None,
+              max_bytes: int = DEFAULT_MAX_MEMORY_MB * 1024 * 1024) -> Image.Image:
+    """RGBA thumbnail fitting in box x box, reducing large sources band by band."""
+    width, height, _ = image_info(path)
+    factor = max(1, min(width, height) // (box * 2))
+    if factor > 1:
+        img = Image.fromarray(downsample(raw_buffer(path, budget), factor, max_bytes))
+    else:
+        with Image.open(path) as src:
+            img = src.convert("RGBA")
+    img.thumbnail((box, box), Image.LANCZOS)
+    return img
+
+
+def save_png(array: np.ndarray, path: Path, optimize: bool = False) -> None:
+    """Encode an (h, w, 4) uint8 array (or memmap) to PNG without copying it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    array = np.ascontiguousarray(array)
+    height, width = array.shape[:2]
+    mode = {1: "L", 3: "RGB", 4: "RGBA"}[array.shape[2] if array.ndim == 3 else 1]
+    img = Image.frombuffer(mode, (width, height), array, "raw", mode, 0, 1)
+    img.save(path, optimize=optimize)
+
+
+def run_parallel(fn: Callable, items: Iterable, workers: int) -> List:
+    """Map fn over items on a thread pool (numpy and Pillow release the GIL)."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, items))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the memory-mapped raw image cache")
+    subparsers = parser.add_subparsers(dest="command")
+
+    warm = subparsers.add_parser("warm", help="Decode PNGs into the raw cache")
+    warm.add_argument("directories", nargs="+", type=Path, help="Directories of PNGs")
+    warm.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                      help="Parallel decoders (default: CPU count)")
+    warm.add_argument("--max-memory-mb", type=int, default=DEFAULT_MAX_MEMORY_MB,
+                      help=f"Total decode memory budget (default: {DEFAULT_MAX_MEMORY_MB})")
+
+    clean = subparsers.add_parser("clean", help="Delete the raw cache")
+    clean.add_argument("--max-size-mb", type=int,
+                       help="Only delete least recently used entries until the cache fits in this size")
+
+    args = parser.parse_args()
+
+    if args.command == "clean":
+        if args.max_size_mb is None:
+            shutil.rmtree(RAW_CACHE_DIR, ignore_errors=True)
+            print(f"Removed {RAW_CACHE_DIR}")
+        else:
+            removed, freed = prune_cache(args.max_size_mb * 1024 * 1024)
+            print(f"Removed {removed} entries ({freed / 1024 / 1024:.0f} MB) from {RAW_CACHE_DIR}")
+        return
+
+    if args.command != "warm":
+        parser.print_help()
+        sys.exit(1)
+
+    budget = MemoryBudget.from_mb(args.max_memory_mb)
+    paths = [p for d in args.directories for p in sorted(d.glob("*.png"))]
+
+    def warm_one(path: Path) -> None:
+        buf = raw_buffer(path, budget)
+        print(f"  {path} ({buf.shape[1]}x{buf.shape[0]})")
+
+    run_parallel(warm_one, paths, args.workers)
+    print(f"\nDONE: {len(paths)} images cached in {RAW_CACHE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Vermillion API Key Pool — spread image requests across several OpenAI keys.
+
+One key caps a sweep at one account's rate limit. With a pool, each request is
+sent on the key with the most headroom left, judged from the rate-limit headers
+of that key's previous responses (x-ratelimit-remaining-requests and
+x-ratelimit-reset-requests). On failure the request moves to another key:
+  429 rate limited      ← key rests until its reset / Retry-After time
+  429 insufficient_quota, 401, 403
+                        ← key is dropped from the pool for this run
+Each key carries at most MAX_IN_FLIGHT requests at once, so a pool of N keys
+runs up to N x MAX_IN_FLIGHT requests in parallel.
+
+Keys come from OPENAI_API_KEYS (comma- or newline-separated, each optionally
+suffixed with :<org-id>), falling back to OPENAI_API_KEY and OPENAI_ORG_ID.
+
+Usage:
+    OPENAI_API_KEYS="sk-aaa,sk-bbb:org-123" python3 generate_round3.py
+    OPENAI_API_KEYS="sk-aaa,sk-bbb" python3 key_pool.py     # check the keys
+
+Requires: pip3 install httpx
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from typing import List, Optional
+import httpx
+
+MODELS_URL = "https://api.openai.com/v1/models"
+
+MAX_IN_FLIGHT = 2          # concurrent requests per key
+DEFAULT_COOLDOWN = 20.0    # seconds a rate-limited key rests when the response gives no reset time
+MAX_RETRIES = 6            # times one request may move to another key
+UNKNOWN_HEADROOM = 1_000_000  # keys with no recent rate-limit headers are treated as fresh
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds from a reset header ("1s", "6m0s", "20ms") or Retry-After ("12")."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * DURATION_UNITS[unit] for n, unit in parts)
+
+
+class KeyPoolExhausted(RuntimeError):
+    """Every key in the pool has been disabled (revoked, forbidden or out of quota)."""
+
+
+def error_code(response: httpx.Response) -> Optional[str]:
+    try:
+        return response.json().get("error", {}).get("code")
+    except (ValueError, AttributeError):
+        return None
+
+
+class ApiKey:
+    """One key (and optional organization) with its last known rate-limit state."""
+
+    def __init__(self, key: str, org: Optional[str] = None):
+        self.key = key
+        self.org = org
+        self.in_flight = 0
+        self.sent = 0
+        self.remaining: Optional[int] = None
+        self.resets_at = 0.0
+        self.cooldown_until = 0.0
+        self.disabled: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        """Short name safe to print."""
+        return f"...{self.key[-4:]}" + (f" ({self.org})" if self.org else "")
+
+    def headers(self) -> dict:
+        headers = {"Authorization": f"Bearer {self.key}"}
+        if self.org:
+            headers["OpenAI-Organization"] = self.org
+        return headers
+
+    def headroom(self, now: float) -> int:
+        """Requests this key can take right now (0 if none)."""
+        if self.disabled or now < self.cooldown_until or self.in_flight >= MAX_IN_FLIGHT:
+            return 0
+        if self.remaining is None or now >= self.resets_at:
+            return UNKNOWN_HEADROOM - self.in_flight
+        return max(0, self.remaining - self.in_flight)
+
+    def wake_time(self) -> Optional[float]:
+        """When a key that is waiting on a limit (not on in-flight requests) frees up."""
+        if self.disabled:
+            return None
+        times = [t for t in (self.cooldown_until, self.resets_at) if t > time.monotonic()]
+        return max(times) if times else None
+
+
+class KeyPool:
+    """Thread-safe key selection with per-key rate-limit tracking and failover."""
+
+    def __init__(self, keys: List[ApiKey]):
+        if not keys:
+            raise ValueError("no API keys given")
+        self.keys = keys
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_env(cls) -> "KeyPool":
+        """Pool from OPENAI_API_KEYS, else OPENAI_API_KEY (+ OPENAI_ORG_ID)."""
+        entries = [e.strip() for e in re.split(r"[,\n]", os.environ.get("OPENAI_API_KEYS", "")) if e.strip()]
+        keys = []
+        for entry in entries:
+            key, _, org = entry.partition(":")
+            keys.append(ApiKey(key.strip(), org.strip() or None))
+        if not keys and os.environ.get("OPENAI_API_KEY"):
+            keys.append(ApiKey(os.environ["OPENAI_API_KEY"], os.environ.get("OPENAI_ORG_ID") or None))
+        if not keys:
+            raise ValueError("set OPENAI_API_KEYS or OPENAI_API_KEY")
+        return cls(keys)
+
+    @property
+    def workers(self) -> int:
+        """Parallel requests the pool can carry."""
+        return len(self.keys) * MAX_IN_FLIGHT
+
+    def live(self) -> List[ApiKey]:
+        return [k for k in self.keys if not k.disabled]
+
+    def acquire(self) -> ApiKey:
+        """Block until a key has headroom and claim one request on it."""
+        with self._cond:
+            while True:
+                if not self.live():
+                    raise KeyPoolExhausted("every API key has been disabled")
+                now = time.monotonic()
+                best = max(self.keys, key=lambda k: (k.headroom(now), -k.sent))
+                if best.headroom(now) > 0:
+                    best.in_flight += 1
+                    best.sent += 1
+                    return best
+                wakes = [t for t in (k.wake_time() for k in self.keys) if t is not None]
+                self._cond.wait(timeout=max(0.05, min(wakes) - now) if wakes else None)
+
+    def release(self, key: ApiKey, response: Optional[httpx.Response]) -> None:
+        """Return a claimed request and record what the response said about the key."""
+        with self._cond:
+            key.in_flight -= 1
+            if response is not None:
+                self._record(key, response)
+            self._cond.notify_all()
+
+    def _record(self, key: ApiKey, response: httpx.Response) -> None:
+        now = time.monotonic()
+        remaining = response.headers.get("x-ratelimit-remaining-requests")
+        if remaining is not None and remaining.isdigit():
+            key.remaining = int(remaining)
+            key.resets_at = now + (parse_duration(response.headers.get("x-ratelimit-reset-requests")) or 0.0)
+
+        status = response.status_code
+        if status in (401, 403):
+            key.disabled = f"HTTP {status}"
+        elif status == 429:
+            if error_code(response) == "insufficient_quota":
+                key.disabled = "quota exhausted"
+            else:
+                wait = (parse_duration(response.headers.get("retry-after"))
+                        or parse_duration(response.headers.get("x-ratelimit-reset-requests"))
+                        or DEFAULT_COOLDOWN)
+                key.cooldown_until = now + wait
+
+    def post(self, client: httpx.Client, url: str, **kwargs) -> httpx.Response:
+        """POST on the key with the most headroom, moving to another key on 401/403/429.
+
+        Returns the last response; the caller checks its status as usual. Raises
+        KeyPoolExhausted only if no key was left to send the request on at all.
+        """
+        response = None
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                key = self.acquire()
+            except KeyPoolExhausted:
+                if response is None:
+                    raise
+                return response
+            try:
+                response = client.post(url, headers=key.headers(), **kwargs)
+            except BaseException:
+                self.release(key, None)
+                raise
+            self.release(key, response)
+
+            if response.status_code not in (401, 403, 429) or attempt == MAX_RETRIES or not self.live():
+                return response
+            state = f"disabled ({key.disabled})" if key.disabled else "rate limited"
+            print(f"  Key {key.label} {state}; retrying on the pool")
+        return response
+
+    def summary(self) -> str:
+        lines = []
+        for k in self.keys:
+            state = f"disabled: {k.disabled}" if k.disabled else "ok"
+            lines.append(f"  Key {k.label}: {k.sent} request(s), {state}")
+        return "\n".join(lines)
+
+
+def main():
+    try:
+        pool = KeyPool.from_env()
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"\n{'='*60}")
+    print(f"Checking {len(pool.keys)} key(s)")
+    print(f"{'='*60}")
+    with httpx.Client(timeout=30.0) as client:
+        for key in pool.keys:
+            response = client.get(MODELS_URL, headers=key.headers())
+            print(f"  Key {key.label}: HTTP {response.status_code}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Vermillion Logo Refiner — tweak an existing logo via the gpt-image-1 edit endpoint.
+
+Instead of regenerating a selected logo from a modified prompt (which costs a full
+high-quality render and usually loses what the client liked), this sends the
+existing PNG — and optionally a mask marking the region to change — to the image
+edit endpoint along with the requested change.
+
+Refinements are written to concepts/refined/ as <key>-e01.png, <key>-e02.png, ...
+and recorded in concepts/refined/refinements.json (source, mask, instructions,
+settings). Re-running an identical refinement is served from that record instead
+of calling the API again.
+
+Usage:
+    OPENAI_API_KEY="sk-..." python3 refine_logo.py refine r3-20-hybrid-dual-tone "Make the circle outline thinner"
+    OPENAI_API_KEY="sk-..." python3 refine_logo.py refine selected/r3-11-clay-terre.png "Warmer brown" --mask masks/terre-seal.png
+    OPENAI_API_KEYS="sk-aaa,sk-bbb" python3 refine_logo.py refine r3-08-home-stacked "Tighter tracking"
+    python3 refine_logo.py list
+
+Requires: pip3 install Pillow httpx
+"""
+
+import os
+import sys
+import argparse
+import base64
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+from typing import Optional
+from PIL import Image
+import io
+import httpx
+
+from generate_round3 import STYLE_BASE
+from key_pool import KeyPool, KeyPoolExhausted
+
+API_URL = "https://api.openai.com/v1/images/edits"
+MODEL = "gpt-image-1"
+
+BASE_DIR = Path(__file__).parent
+OUTPUT_DIR = BASE_DIR / "concepts" / "refined"
+METADATA_FILE = OUTPUT_DIR / "refinements.json"
+
+# Where a bare key like "r3-20-hybrid-dual-tone" is looked up, in order
+SOURCE_DIRS = [
+    BASE_DIR / "selected",
+    BASE_DIR / "concepts" / "round3",
+    OUTPUT_DIR,
+]
+
+REFINE_TEMPLATE = (
+    "Refine this existing logo. Apply only the following change: {instructions} "
+    "Keep everything else exactly as it is — same composition, typography, colors and "
+    "proportions. The word 'VERMILLION' must remain spelled correctly with two L's. "
+    "{style}"
+)
+
+
+def resolve_source(source: str) -> Optional[Path]:
+    """Resolve a file path or a logo key to the base (non -4x) PNG to edit.
+
+    A -4x path maps to the base PNG next to it, or else to the key's base PNG in
+    SOURCE_DIRS, so a 4096px upscale is never uploaded.
+    """
+    path = Path(source)
+    if path.suffix == ".png" and path.stem.endswith("-4x"):
+        base = path.with_name(f"{path.stem[:-3]}.png")
+        if base.exists():
+            return base
+    elif path.suffix == ".png" and path.exists():
+        return path
+    key = path.stem if path.suffix == ".png" else source
+    if key.endswith("-4x"):
+        key = key[:-3]
+    for directory in SOURCE_DIRS:
+        candidate = directory / f"{key}.png"
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def load_metadata() -> dict:
+    """Load the refinement record, or an empty one."""
+    if METADATA_FILE.exists():
+        with open(METADATA_FILE) as f:
+            return json.load(f)
+    return {"refinements": []}
+
+
+def save_metadata(metadata: dict) -> None:
+    """Write the refinement record atomically."""
+    METADATA_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = METADATA_FILE.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+    tmp_path.replace(METADATA_FILE)
+
+
+def cache_key(image_bytes: bytes, mask_bytes: Optional[bytes], prompt: str, size: str, quality: str) -> str:
+    """Hash everything that determines the edit result."""
+    h = hashlib.sha256()
+    for part in (image_bytes, mask_bytes or b"", prompt.encode(), size.encode(), quality.encode()):
+        h.update(hashlib.sha256(part).digest())
+    return h.hexdigest()[:16]
+
+
+def next_output_path(key: str) -> Path:
+    """Pick the next free <key>-eNN.png in the output directory."""
+    i = 1
+    while (OUTPUT_DIR / f"{key}-e{i:02d}.png").exists():
+        i += 1
+    return OUTPUT_DIR / f"{key}-e{i:02d}.png"
+
+
+def edit_image(client: httpx.Client, pool: KeyPool, image_bytes: bytes, prompt: str,
+               mask_bytes: Optional[bytes] = None, size: str = "1024x1024",
+               quality: str = "high") -> Optional[bytes]:
+    """Call OpenAI image edit API and return PNG bytes."""
+    data = {
+        "model": MODEL,
+        "prompt": prompt,
+        "size": size,
+        "quality": quality,
+        "n": "1",
+    }
+    files = {"image": ("image.png", image_bytes, "image/png")}
+    if mask_bytes is not None:
+        files["mask"] = ("mask.png", mask_bytes, "image/png")
+
+    print(f"  Calling {MODEL} edit ({size}, {quality}{', masked' if mask_bytes else ''})...")
+
+    try:
+        response = pool.post(client, API_URL, data=data, files=files)
+        response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        print(f"  API error ({e.response.status_code}): {e.response.text[:300]}")
+        return None
+    except KeyPoolExhausted as e:
+        print(f"  API error: {e}")
+        return None
+
+    body = response.json()
+    if "data" in body and len(body["data"]) > 0:
+        item = body["data"][0]
+        if "b64_json" in item:
+            return base64.b64decode(item["b64_json"])
+        elif "url" in item:
+            img_resp = client.get(item["url"])
+            img_resp.raise_for_status()
+            return img_resp.content
+
+    print("  Unexpected response format")
+    return None
+
+
+def check_mask(mask_bytes: bytes, image_size: tuple) -> Optional[str]:
+    """Return an error message if the mask can't be used with the source image."""
+    mask = Image.open(io.BytesIO(mask_bytes))
+    if mask.size != image_size:
+        return f"mask is {mask.size[0]}x{mask.size[1]}, image is {image_size[0]}x{image_size[1]}"
+    if "A" not in mask.getbands():
+        return "mask has no alpha channel (transparent pixels mark the area to edit)"
+    return None
+
+
+def run_refine(client: httpx.Client, pool: KeyPool, source: Path, instructions: str,
+               mask_path: Optional[Path], size: str, quality: str) -> Optional[Path]:
+    """Refine one source image. Returns the output path, or None on failure."""
+    image_bytes = source.read_bytes()
+    image_size = Image.open(io.BytesIO(image_bytes)).size
+    mask_bytes = mask_path.read_bytes() if mask_path else None
+    if mask_bytes is not None:
+        problem = check_mask(mask_bytes, image_size)
+        if problem:
+            print(f"  Error: {problem}")
+            return None
+
+    prompt = REFINE_TEMPLATE.format(instructions=instructions.strip(), style=STYLE_BASE)
+    key = cache_key(image_bytes, mask_bytes, prompt, size, quality)
+
+    metadata = load_metadata()
+    for entry in metadata["refinements"]:
+        if entry["cache_key"] == key and (BASE_DIR / entry["output"]).exists():
+            print(f"  SKIP (cached): {entry['output']}")
+            return BASE_DIR / entry["output"]
+
+    start = time.time()
+    result = edit_image(client, pool, image_bytes, prompt, mask_bytes, size=size, quality=quality)
+    if not result:
+        return None
+
+    stem = source.stem
+    # Refining a refinement keeps the original key: r3-20-...-e01 -> r3-20-...-e02
+    match = re.fullmatch(r"(.+)-e\d{2}", stem)
+    if source.resolve().parent == OUTPUT_DIR.resolve() and match:
+        stem = match.group(1)
+    output_path = next_output_path(stem)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(result)
+    img = Image.open(io.BytesIO(result))
+    print(f"  Saved: {output_path} ({img.size[0]}x{img.size[1]}, {time.time() - start:.1f}s)")
+
+    metadata["refinements"].append({
+        "cache_key": key,
+        "output": str(output_path.relative_to(BASE_DIR)),
+        "source": os.path.relpath(source, BASE_DIR),
+        "source_sha256": hashlib.sha256(image_bytes).hexdigest(),
+        "mask": str(mask_path) if mask_path else None,
+        "instructions": instructions,
+        "model": MODEL,
+        "size": size,
+        "quality": quality,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    save_metadata(metadata)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refine existing Vermillion logos via the OpenAI image edit API")
+    subparsers = parser.add_subparsers(dest="command")
+
+    refine = subparsers.add_parser("refine", help="Apply a change to an existing logo")
+    refine.add_argument("source", help="Logo key (e.g. r3-20-hybrid-dual-tone) or path to a PNG")
+    refine.add_argument("instructions", help="The change to make, in plain words")
+    refine.add_argument("--mask", type=Path,
+                        help="PNG with alpha, same size as the source; transparent areas are edited")
+    refine.add_argument("--quality", choices=["low", "medium", "high"], default="medium",
+                        help="Image quality (default: medium)")
+    refine.add_argument("--size", default="1024x1024",
+                        help="Output size (default: 1024x1024)")
+
+    subparsers.add_parser("list", help="List recorded refinements")
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for entry in load_metadata()["refinements"]:
+            print(f"{entry['output']}  <-  {entry['source']}")
+            print(f"    {entry['instructions']}")
+        return
+
+    if args.command != "refine":
+        parser.print_help()
+        sys.exit(1)
+
+    source = resolve_source(args.source)
+    if source is None:
+        print(f"Error: no PNG found for '{args.source}'")
+        sys.exit(1)
+    if args.mask and not args.mask.exists():
+        print(f"Error: mask not found: {args.mask}")
+        sys.exit(1)
+
+    try:
+        pool = KeyPool.from_env()
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"\n{'='*60}")
+    print(f"Refining: {source}")
+    print(f"Change: {args.instructions}")
+    print(f"{'='*60}")
+
+    with httpx.Client(timeout=180.0) as client:
+        output_path = run_refine(client, pool, source, args.instructions,
+                                 args.mask, args.size, args.quality)
+
+    if output_path is None:
+        print("  FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Vermillion Background Removal — transparent and dark-mode variants for a whole set.
+
+Every prompt asks for a "clean white background", so the raw renders carry an opaque
+white (or cream) square. For each PNG in the given directories this writes:
+  <dir>/transparent/<name>.png  ← original colors, background keyed out to alpha
+  <dir>/dark/<name>.png         ← the same mark made readable on deep vermillion,
+                                  for the gallery's dark toggle and dark mockups
+
+The background color and its noise level are estimated from the image border, so
+cream and lightly textured backgrounds key out as cleanly as pure white. Alpha is
+unmixed per pixel against that color (as in "color to alpha") after discounting
+the measured noise; anything at least --softness away from the background is solid
+ink, so light brand colors (gold, sage) stay opaque while anti-aliased edges ramp
+smoothly and lose their light fringe. Background texture connected to the border
+is forced fully transparent, and a key that still leaves alpha on the border frame
+is reported as a failure instead of being written. Images that already have a
+transparent background keep their alpha.
+
+The dark variant keeps the mark's tonal structure. Ink that already has
+MIN_CONTRAST against --vermillion-deep keeps its color; darker ink (typically the
+wordmark) has its luminance folded up into the readable range, towards the cream
+--dark-color, so darker tones come out lighter and distinct tones stay distinct.
+Marks whose ink already reads on the dark background are copied unchanged.
+
+Images are processed in row bands from the memory-mapped raw cache (image_tiles.py),
+in parallel across the set. Outputs newer than their source are skipped.
+
+Usage:
+    python3 remove_background.py                         # selected/
+    python3 remove_background.py concepts/round3 selected --workers 8
+    python3 remove_background.py selected --dark-color "#FAF7F2" --softness 0.2 --force
+
+Requires: pip3 install Pillow numpy
+"""
+
+import os
+import sys
+import argparse
+import math
+from pathlib import Path
+from typing import List, Optional, Tuple
+import numpy as np
+
+from image_tiles import (
+    DEFAULT_MAX_MEMORY_MB, MemoryBudget, create_buffer, iter_bands, raw_buffer,
+    release_buffer, run_parallel, save_png,
+)
+
+BASE_DIR = Path(__file__).parent
+VARIANT_DIRS = ("transparent", "dark")
+
+DARK_INK = "#F5F0E8"       # Cream/Sand from the brand palette
+DARK_BACKGROUND = "#7A3428"  # --vermillion-deep in index.html, behind the dark variant
+MIN_CONTRAST = 3.0         # WCAG contrast ratio for graphics against DARK_BACKGROUND
+READABLE_SHARE = 0.9       # marks with this share of solid ink already readable are copied as is
+SOFTNESS = 0.3             # unmixed alpha at and above this is fully opaque ink
+OPAQUE_BORDER = 0.5        # fraction of opaque border pixels for "has a background"
+NOISE_PERCENTILE = 99.9    # border deviation (levels) taken as the background's noise
+MIN_NOISE = 2.0            # noise floor (levels) for perfectly flat backgrounds
+HAZE_FACTOR = 2.0          # border-connected pixels within this many noise levels are background
+CONNECTIVITY_GRID = 256    # background connectivity is traced on a grid about this many blocks wide
+MAX_BORDER_ALPHA = 1.0     # mean alpha (0-255) the keyed border frame may keep
+
+
+def hex_to_rgb(value: str) -> Tuple[int, int, int]:
+    value = value.lstrip("#")
+    return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def list_sources(directories: List[Path]) -> List[Path]:
+    """Top-level PNGs of each directory (variant subdirectories are not descended)."""
+    return [p for d in directories for p in sorted(d.glob("*.png"))]
+
+
+def output_paths(path: Path) -> Tuple[Path, Path]:
+    return tuple(path.parent / kind / path.name for kind in VARIANT_DIRS)
+
+
+def is_stale(path: Path) -> bool:
+    src_mtime = path.stat().st_mtime
+    return any(not out.exists() or out.stat().st_mtime < src_mtime for out in output_paths(path))
+
+
+def border_pixels(array: np.ndarray, width: int = 4) -> np.ndarray:
+    """(n, 4) pixels from a frame `width` px wide around the image."""
+    return np.concatenate([
+        array[:width].reshape(-1, 4), array[-width:].reshape(-1, 4),
+        array[:, :width].reshape(-1, 4), array[:, -width:].reshape(-1, 4),
+    ])
+
+
+def estimate_background(array: np.ndarray) -> Optional[Tuple[np.ndarray, float]]:
+    """(background RGB, noise in levels) from opaque border pixels, or None if already transparent."""
+    border = border_pixels(array)
+    opaque = border[border[:, 3] > 250]
+    if len(opaque) < OPAQUE_BORDER * len(border):
+        return None
+    background = np.median(opaque[:, :3], axis=0).astype(np.float32)
+    deviation = np.abs(opaque[:, :3] - background).max(axis=-1)
+    return background, max(MIN_NOISE, float(np.percentile(deviation, NOISE_PERCENTILE)))
+
+
+def deviation(rgb: np.ndarray, background: np.ndarray) -> np.ndarray:
+    """Largest per-channel distance (levels) of each pixel from the background."""
+    return np.abs(rgb - background).max(axis=-1)
+
+
+def unmix_alpha(rgb: np.ndarray, background: np.ndarray, noise: float = 0.0) -> np.ndarray:
+    """Per-pixel alpha of rgb against a solid background (max over channels).
+
+    Deviations within `noise` levels count as background; without this a near-white
+    background turns its own texture into alpha, since 255 - background is tiny.
+    """
+    darker = np.maximum(background - rgb - noise, 0.0) / np.maximum(background - noise, 1.0)
+    lighter = np.maximum(rgb - background - noise, 0.0) / np.maximum(255.0 - background - noise, 1.0)
+    return np.maximum(darker, lighter).max(axis=-1)
+
+
+def background_connected(src: np.ndarray, background: np.ndarray, noise: float,
+                         band_bytes: int) -> Tuple[np.ndarray, int]:
+    """Blocks of near-background pixels connected to the image border.
+
+    Traced on a coarse grid (one cell per block x block pixels) so it stays cheap
+    and banded for 4x images. Returns the grid, grown by one cell so pixels at the
+    edge of ink-bearing blocks are covered, and the block size.
+    """
+    height, width = src.shape[:2]
+    block = max(1, math.ceil(max(height, width) / CONNECTIVITY_GRID))
+    grid = np.zeros((math.ceil(height / block), math.ceil(width / block)), dtype=bool)
+    for y0, y1, band in iter_bands(src, band_bytes // 6, multiple=block):
+        near = deviation(band[..., :3].astype(np.float32), background) <= HAZE_FACTOR * noise
+        pad_y = -near.shape[0] % block
+        pad_x = -near.shape[1] % block
+        near = np.pad(near, ((0, pad_y), (0, pad_x)), constant_values=True)
+        cells = near.reshape(near.shape[0] // block, block, grid.shape[1], block).all(axis=(1, 3))
+        grid[y0 // block:y0 // block + len(cells)] = cells
+
+    reached = np.zeros_like(grid)
+    for edge in (np.s_[0, :], np.s_[-1, :], np.s_[:, 0], np.s_[:, -1]):
+        reached[edge] = grid[edge]
+    while True:
+        grown = grow(reached) & grid
+        if np.array_equal(grown, reached):
+            return grow(reached), block
+        reached = grown
+
+
+def grow(mask: np.ndarray) -> np.ndarray:
+    """mask dilated by one cell (4-connected)."""
+    grown = mask.copy()
+    grown[1:] |= mask[:-1]
+    grown[:-1] |= mask[1:]
+    grown[:, 1:] |= mask[:, :-1]
+    grown[:, :-1] |= mask[:, 1:]
+    return grown
+
+
+def expand_rows(grid: np.ndarray, block: int, y0: int, y1: int, width: int) -> np.ndarray:
+    """Full-resolution (y1 - y0, width) view of grid cells for one band."""
+    cells = grid[y0 // block:math.ceil(y1 / block)]
+    rows = np.repeat(np.repeat(cells, block, axis=0), block, axis=1)
+    offset = y0 - (y0 // block) * block
+    return rows[offset:offset + y1 - y0, :width]
+
+
+def key_band(band: np.ndarray, background: np.ndarray, noise: float, connected: np.ndarray,
+             softness: float) -> np.ndarray:
+    """Transparent RGBA band for one band of an opaque-background image."""
+    rgb = band[..., :3].astype(np.float32)
+    raw = unmix_alpha(rgb, background, noise)
+    alpha = np.clip(raw / softness, 0.0, 1.0)
+    alpha[connected & (deviation(rgb, background) <= HAZE_FACTOR * noise)] = 0.0
+
+    # Decontaminate edge colors so that a*f + (1-a)*bg == c still holds on the
+    # original background: f = bg + (c - bg) / a
+    a = np.maximum(alpha, 1e-3)[..., None]
+    color = np.clip(background + (rgb - background) / a, 0.0, 255.0)
+    alpha *= band[..., 3] / 255.0
+
+    alpha8 = (alpha * 255.0 + 0.5).astype(np.uint8)
+    transparent = np.empty(band.shape, dtype=np.uint8)
+    transparent[..., :3] = np.where(alpha8[..., None] > 0, color + 0.5, 0).astype(np.uint8)
+    transparent[..., 3] = alpha8
+    return transparent
+
+
+def to_linear(rgb: np.ndarray) -> np.ndarray:
+    """sRGB 0-255 -> linear 0-1."""
+    c = np.asarray(rgb, dtype=np.float32) / 255.0
+    return np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+
+
+def to_srgb(linear: np.ndarray) -> np.ndarray:
+    """Linear 0-1 -> sRGB 0-255 (float)."""
+    c = np.clip(linear, 0.0, 1.0)
+    return np.where(c <= 0.0031308, c * 12.92, 1.055 * c ** (1 / 2.4) - 0.055) * 255.0
+
+
+def luminance(linear: np.ndarray) -> np.ndarray:
+    return linear @ np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+
+def readable_luminance() -> float:
+    """Lowest ink luminance with MIN_CONTRAST against DARK_BACKGROUND."""
+    background = float(luminance(to_linear(hex_to_rgb(DARK_BACKGROUND))))
+    return MIN_CONTRAST * (background + 0.05) - 0.05
+
+
+def readable_share(array: np.ndarray, band_bytes: int) -> float:
+    """Share of solid ink pixels that already read on DARK_BACKGROUND."""
+    threshold = readable_luminance()
+    solid = readable = 0
+    for _, _, band in iter_bands(array, band_bytes // 6):
+        ink = np.asarray(band)[..., 3] >= 128
+        y = luminance(to_linear(np.asarray(band)[..., :3][ink]))
+        solid += len(y)
+        readable += int((y >= threshold).sum())
+    return readable / solid if solid else 1.0
+
+
+def dark_band(band: np.ndarray, dark_ink: np.ndarray) -> np.ndarray:
+    """A band of the transparent variant made readable on DARK_BACKGROUND.
+
+    Ink at or above the readable luminance is kept. Below it, luminance Y is
+    folded to cream - (cream - readable) * Y / readable by mixing the pixel towards
+    the cream ink in linear light, so black becomes cream, near-readable tones stay
+    near the threshold, and the order of the dark tones is preserved (reversed).
+    """
+    threshold = readable_luminance()
+    linear = to_linear(band[..., :3])
+    y = luminance(linear)
+    ink = to_linear(dark_ink)
+    ink_y = float(luminance(ink))
+
+    target = ink_y - (ink_y - threshold) * np.clip(y / threshold, 0.0, 1.0)
+    t = np.clip((target - y) / np.maximum(ink_y - y, 1e-6), 0.0, 1.0)[..., None]
+    folded = linear + (ink - linear) * t
+    out = np.array(band, dtype=np.uint8)
+    dark = (y < threshold) & (band[..., 3] > 0)
+    out[..., :3][dark] = (to_srgb(folded[dark]) + 0.5).astype(np.uint8)
+    return out
+
+
+def process_image(path: Path, budget: MemoryBudget, band_bytes: int, softness: float,
+                  dark_ink: np.ndarray) -> str:
+    """Write both variants for one image. Returns a one-line status."""
+    src = raw_buffer(path, budget)
+    estimate = estimate_background(src)
+    if estimate is not None:
+        background, noise = estimate
+        grid, block = background_connected(src, background, noise, band_bytes)
+
+    transparent = src if estimate is None else create_buffer(src.shape, "transparent")
+    dark = create_buffer(src.shape, "dark")
+    try:
+        # Working set per band is a handful of float32 copies of the band
+        if estimate is not None:
+            for y0, y1, band in iter_bands(src, band_bytes // 6):
+                connected = expand_rows(grid, block, y0, y1, src.shape[1])
+                transparent[y0:y1] = key_band(np.asarray(band), background, noise, connected, softness)
+
+            border_alpha = border_pixels(transparent)[:, 3].mean()
+            if border_alpha > MAX_BORDER_ALPHA:
+                raise ValueError(f"background key left mean alpha {border_alpha:.1f}/255 on the border")
+
+        share = readable_share(transparent, band_bytes)
+        for y0, y1, band in iter_bands(transparent, band_bytes // 6):
+            dark[y0:y1] = band if share >= READABLE_SHARE else dark_band(np.asarray(band), dark_ink)
+
+        transparent_path, dark_path = output_paths(path)
+        save_png(transparent, transparent_path)
+        save_png(dark, dark_path)
+    finally:
+        if transparent is not src:
+            release_buffer(transparent)
+        release_buffer(dark)
+
+    dark_status = "dark copied as is" if share >= READABLE_SHARE else f"{share:.0%} of ink readable on dark"
+    if estimate is None:
+        return f"{path} (already transparent, {dark_status})"
+    bg = "#%02X%02X%02X" % tuple(int(c) for c in background)
+    return f"{path} (background {bg}, noise {noise:.0f}, {dark_status})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Derive transparent and dark-mode variants of logo PNGs")
+    parser.add_argument("directories", nargs="*", type=Path, default=[BASE_DIR / "selected"],
+                        help="Directories of PNGs (default: selected/)")
+    parser.add_argument("--dark-color", default=DARK_INK,
+                        help=f"Lightest ink for dark-background variants (default: {DARK_INK})")
+    parser.add_argument("--softness", type=float, default=SOFTNESS,
+                        help=f"Distance from the background (0-1) that counts as solid ink (default: {SOFTNESS})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="Images processed in parallel (default: CPU count)")
+    parser.add_argument("--max-memory-mb", type=int, default=DEFAULT_MAX_MEMORY_MB,
+                        help=f"Memory budget shared by all workers (default: {DEFAULT_MAX_MEMORY_MB})")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild variants even if they are up to date")
+    args = parser.parse_args()
+
+    for directory in args.directories:
+        if not directory.is_dir():
+            print(f"Error: not a directory: {directory}")
+            sys.exit(1)
+
+    sources = list_sources(args.directories)
+    todo = [p for p in sources if args.force or is_stale(p)]
+    print(f"\n{'='*60}")
+    print(f"Background removal: {len(todo)} of {len(sources)} images need variants")
+    print(f"{'='*60}")
+
+    budget = MemoryBudget.from_mb(args.max_memory_mb)
+    band_bytes = budget.per_worker(args.workers)
+    dark_ink = np.asarray(hex_to_rgb(args.dark_color), dtype=np.uint8)
+
+    def run(path: Path) -> bool:
+        try:
+            print(f"  {process_image(path, budget, band_bytes, args.softness, dark_ink)}")
+            return True
+        except (OSError, ValueError) as e:
+            print(f"  FAILED: {path} ({e})")
+            return False
+
+    results = run_parallel(run, todo, args.workers)
+
+    print(f"\n{'='*60}")
+    print(f"DONE: {sum(results)}/{len(todo)} images processed")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Vermillion Gallery Server — serve index.html and its images with proper HTTP caching.
+
+Opening index.html from disk gets no caching, no compression, and every lightbox
+-4x miss is a failed fetch. This serves the gallery over HTTP/1.1 (standard library
+only) with:
+
+  - Strong ETags from content hashes (sheets/manifest.json for images, computed and
+    cached for everything else) and 304s on If-None-Match.
+  - Content-hashed image URLs: index.html is rewritten on the fly so each
+    src="selected/x.png" becomes "selected/x.png?v=<hash>", and responses whose
+    ?v= matches the hash of the file actually requested are sent "immutable" for a
+    year. Anything else, including fallbacks, is "no-cache" and revalidated by ETag.
+  - Single byte-range requests (206 / 416), with If-Range.
+  - Pre-compressed HTML/SVG/JSON/CSS/JS: <file>.br or <file>.gz next to the file is
+    sent when the client accepts it and it is at least as new as the original;
+    --precompress writes the .gz files, and the rewritten index.html is gzipped in
+    memory once per change.
+  - Server-side fallbacks resolved from the manifest: a missing <name>-4x.png is
+    answered with <name>.png, and a missing dark/ variant with the original.
+
+Only index.html, images under selected/ and concepts/, and images and JSON under
+sheets/ are served; scripts, exports, refinement records and dotfiles are not.
+
+Usage:
+    python3 serve_gallery.py                          # http://127.0.0.1:8000/
+    python3 serve_gallery.py --host 0.0.0.0 --port 8080 --precompress
+
+Requires: pip3 install Pillow  (for the manifest)
+"""
+
+import sys
+import argparse
+import email.utils
+import gzip
+import hashlib
+import mimetypes
+import re
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import gallery_manifest
+
+BASE_DIR = Path(__file__).parent
+INDEX = "index.html"
+
+COMPRESSIBLE = {".html", ".svg", ".json", ".css", ".js"}
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]   # preference order
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+COPY_CHUNK = 64 * 1024
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".svg"}
+PUBLIC_DIRS = {                 # top-level folder -> file types served from it
+    "selected": IMAGE_SUFFIXES,
+    "concepts": IMAGE_SUFFIXES,
+    "sheets": IMAGE_SUFFIXES | {".json"},
+}
+
+IMG_SRC = re.compile(r'(src=")([^"?#]+\.png)(")')
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class Asset:
+    """A resolved response body: a file on disk or bytes in memory."""
+
+    def __init__(self, path: Optional[Path], etag_hash: str, size: int, mtime: float,
+                 content_type: str, data: Optional[bytes] = None, encoding: Optional[str] = None,
+                 version_hash: Optional[str] = None):
+        self.path = path
+        self.etag_hash = etag_hash
+        # Hash a ?v= must match for an immutable response: that of the requested
+        # file itself, or None when a fallback (or nothing versionable) was served
+        self.version_hash = version_hash
+        self.size = size
+        self.mtime = mtime
+        self.content_type = content_type
+        self.data = data
+        self.encoding = encoding
+
+    @property
+    def etag(self) -> str:
+        # Encoded representations get their own strong validator
+        suffix = f"-{self.encoding}" if self.encoding else ""
+        return f'"{self.etag_hash[:32]}{suffix}"'
+
+
+class GalleryState:
+    """Manifest, hash cache and rendered index.html shared by request threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._manifest_mtime = None
+        self.files: Dict[str, dict] = {}
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+        self._index: Optional[Tuple[tuple, bytes, bytes, str]] = None
+
+    def manifest_files(self) -> Dict[str, dict]:
+        """Manifest entries, reloaded whenever watch_gallery.py rewrites the file."""
+        try:
+            mtime = gallery_manifest.MANIFEST_PATH.stat().st_mtime_ns
+        except FileNotFoundError:
+            return self.files
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                self.files = gallery_manifest.load_manifest().get("files", {})
+                self._manifest_mtime = mtime
+            return self.files
+
+    def file_hash(self, rel: str, path: Path) -> str:
+        """SHA-256 of a file: from the manifest if current, else hashed and cached."""
+        st = path.stat()
+        entry = self.manifest_files().get(rel)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["sha256"]
+        with self._lock:
+            cached = self._hashes.get(rel)
+            if cached and cached[:2] == (st.st_size, st.st_mtime_ns):
+                return cached[2]
+        digest = gallery_manifest.file_sha256(path)
+        with self._lock:
+            self._hashes[rel] = (st.st_size, st.st_mtime_ns, digest)
+        return digest
+
+    def exists(self, rel: str) -> bool:
+        return rel in self.manifest_files() or (BASE_DIR / rel).is_file()
+
+    def rendered_index(self) -> Tuple[bytes, bytes, str, float]:
+        """(html, gzipped html, sha256, mtime) of index.html with hashed image URLs."""
+        path = BASE_DIR / INDEX
+        st = path.stat()
+        self.manifest_files()
+        key = (st.st_mtime_ns, st.st_size, self._manifest_mtime)
+        with self._lock:
+            if self._index and self._index[0] == key:
+                return self._index[1], self._index[2], self._index[3], st.st_mtime
+        html = path.read_text(encoding="utf-8")
+
+        def version(match: re.Match) -> str:
+            rel = match.group(2)
+            target = BASE_DIR / rel
+            if not target.is_file():
+                return match.group(0)
+            return f"{match.group(1)}{rel}?v={self.file_hash(rel, target)[:12]}{match.group(3)}"
+
+        body = IMG_SRC.sub(version, html).encode("utf-8")
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            self._index = (key, body, gz, digest)
+        return body, gz, digest, st.st_mtime
+
+
+def is_public(rel: str) -> bool:
+    """Whether a request path is inside the served allowlist."""
+    parts = Path(rel).parts
+    if any(part.startswith(".") for part in parts) or ".." in parts:
+        return False
+    if rel == INDEX:
+        return True
+    return len(parts) >= 2 and Path(rel).suffix.lower() in PUBLIC_DIRS.get(parts[0], ())
+
+
+def fallback_for(rel: str) -> Optional[str]:
+    """Next asset to try when `rel` doesn't exist: -4x -> base, dark/x -> x."""
+    parts = rel.split("/")
+    if len(parts) >= 2 and parts[-2] == "dark":
+        return "/".join(parts[:-2] + parts[-1:])
+    if rel.endswith("-4x.png"):
+        return rel[:-len("-4x.png")] + ".png"
+    return None
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(start, end inclusive) for a single bytes= range; None if unsatisfiable.
+
+    Raises ValueError for ranges this server doesn't handle (multi-range), in which
+    case the full body is sent.
+    """
+    match = RANGE.match(header.strip())
+    if not match:
+        raise ValueError(header)
+    first, last = match.groups()
+    if first == "" and last == "":
+        raise ValueError(header)
+    if first == "":
+        length = int(last)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return None
+    return start, end
+
+
+class GalleryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "VermillionGallery/1.0"
+    state: GalleryState = None
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body: bool) -> None:
+        url = urlsplit(self.path)
+        rel = unquote(url.path).lstrip("/") or INDEX
+        version = parse_qs(url.query).get("v", [None])[0]
+
+        asset = self.resolve(rel)
+        if asset is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        immutable = version and asset.version_hash and asset.version_hash.startswith(version)
+        cache_control = IMMUTABLE if immutable else REVALIDATE
+        if_none_match = [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]
+        if asset.etag in if_none_match or "*" in if_none_match:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_common(asset, cache_control)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, end = 0, asset.size - 1
+        status = HTTPStatus.OK
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if range_header and asset.size > 0 and (if_range is None or if_range == asset.etag):
+            try:
+                byte_range = parse_range(range_header, asset.size)
+            except ValueError:
+                byte_range = (0, asset.size - 1)
+            if byte_range is None:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_common(asset, cache_control)
+                self.send_header("Content-Range", f"bytes */{asset.size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            start, end = byte_range
+            if (start, end) != (0, asset.size - 1):
+                status = HTTPStatus.PARTIAL_CONTENT
+
+        length = max(0, end - start + 1)
+        self.send_response(status)
+        self.send_common(asset, cache_control)
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{asset.size}")
+        self.send_header("Content-Length", str(length))
+        self.end_headers()
+        if send_body and length:
+            self.send_body(asset, start, length)
+
+    def send_common(self, asset: Asset, cache_control: str) -> None:
+        self.send_header("Content-Type", asset.content_type)
+        self.send_header("ETag", asset.etag)
+        self.send_header("Last-Modified", email.utils.formatdate(asset.mtime, usegmt=True))
+        self.send_header("Cache-Control", cache_control)
+        self.send_header("Accept-Ranges", "bytes")
+        if asset.encoding:
+            self.send_header("Content-Encoding", asset.encoding)
+        if asset.encoding or Path(asset.path or INDEX).suffix in COMPRESSIBLE:
+            self.send_header("Vary", "Accept-Encoding")
+
+    def send_body(self, asset: Asset, start: int, length: int) -> None:
+        if asset.data is not None:
+            self.wfile.write(asset.data[start:start + length])
+            return
+        with open(asset.path, "rb") as f:
+            f.seek(start)
+            remaining = length
+            while remaining:
+                chunk = f.read(min(COPY_CHUNK, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+    def accepts(self, encoding: str) -> bool:
+        accepted = self.headers.get("Accept-Encoding", "")
+        return any(part.split(";")[0].strip() == encoding for part in accepted.split(","))
+
+    def resolve(self, rel: str) -> Optional[Asset]:
+        """Map a request path to an Asset, applying fallbacks and encodings."""
+        if not is_public(rel):
+            return None
+
+        if rel == INDEX:
+            body, gz, digest, mtime = self.state.rendered_index()
+            if self.accepts("gzip"):
+                return Asset(None, digest, len(gz), mtime, "text/html; charset=utf-8", gz, "gzip")
+            return Asset(None, digest, len(body), mtime, "text/html; charset=utf-8", body)
+
+        requested = rel
+        while rel and not self.state.exists(rel):
+            rel = fallback_for(rel)
+        if not rel:
+            return None
+        path = BASE_DIR / rel
+        if not path.is_file():
+            return None
+        digest = self.state.file_hash(rel, path)
+        version_hash = digest if rel == requested else None
+
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or path.suffix in {".svg", ".json", ".js"}:
+            content_type += "; charset=utf-8"
+        st = path.stat()
+        if path.suffix in COMPRESSIBLE:
+            for encoding, suffix in ENCODINGS:
+                encoded = path.with_name(path.name + suffix)
+                if self.accepts(encoding) and encoded.is_file() and encoded.stat().st_mtime >= st.st_mtime:
+                    encoded_digest = self.state.file_hash(rel + suffix, encoded)
+                    return Asset(encoded, encoded_digest, encoded.stat().st_size, st.st_mtime,
+                                 content_type, encoding=encoding, version_hash=version_hash)
+        return Asset(path, digest, st.st_size, st.st_mtime, content_type, version_hash=version_hash)
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"  {self.address_string()} {format % args}\n")
+
+
+def precompress(root: Path = BASE_DIR) -> int:
+    """Write <file>.gz for every served compressible file that is missing or stale."""
+    count = 0
+    candidates = [root / INDEX] + [p for d in PUBLIC_DIRS if (root / d).is_dir() for p in (root / d).rglob("*")]
+    for path in candidates:
+        rel = path.relative_to(root).as_posix()
+        if path.suffix not in COMPRESSIBLE or not is_public(rel) or not path.is_file():
+            continue
+        target = path.with_name(path.name + ".gz")
+        if target.exists() and target.stat().st_mtime >= path.stat().st_mtime:
+            continue
+        with open(path, "rb") as src, gzip.open(target, "wb", compresslevel=9) as dst:
+            for chunk in iter(lambda: src.read(COPY_CHUNK), b""):
+                dst.write(chunk)
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Vermillion gallery with caching and compression")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Bind address; use 0.0.0.0 to serve the office LAN (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000,
+                        help="Port (default: 8000)")
+    parser.add_argument("--precompress", action="store_true",
+                        help="Write .gz files for HTML/SVG/JSON/CSS/JS before serving")
+    args = parser.parse_args()
+
+    if not (BASE_DIR / INDEX).exists():
+        print(f"Error: {INDEX} not found in {BASE_DIR}")
+        sys.exit(1)
+
+    print("Refreshing gallery manifest...")
+    gallery_manifest.refresh()
+    if args.precompress:
+        print(f"Pre-compressed {precompress()} file(s)")
+
+    GalleryHandler.state = GalleryState()
+    server = ThreadingHTTPServer((args.host, args.port), GalleryHandler)
+    print(f"\n{'='*60}")
+    print(f"Serving {BASE_DIR} at http://{args.host}:{args.port}/")
+    print(f"{'='*60}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
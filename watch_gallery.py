@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Vermillion Gallery Watcher — rebuild only what a new or changed image affects.
+
+Watches selected/ and concepts/ (and new subfolders as they appear) with Linux
+inotify. When a PNG lands, changes or is removed, and has been quiet for the
+debounce interval, only its own derivatives are rebuilt on the worker pool:
+
+  - transparent/ and dark/ variants          (remove_background.py)
+  - its entries in sheets/manifest.json      (gallery_manifest.py)
+  - its small-size legibility score          (check_legibility.py)
+  - the contact sheet + atlas cell for its folder, repainted in place when the
+    folder's file list is unchanged          (build_contact_sheet.py)
+
+On start, sources whose variants are older than the source are queued once, so
+the watcher also catches up on anything that landed while it wasn't running.
+Variant folders and sheets/ are not watched, so the watcher's own output never
+re-triggers it.
+
+Usage:
+    python3 watch_gallery.py
+    python3 watch_gallery.py --debounce 2 --workers 4 --max-memory-mb 256
+
+Requires: pip3 install Pillow numpy  (Linux)
+"""
+
+import os
+import sys
+import argparse
+import ctypes
+import ctypes.util
+import select
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+import numpy as np
+
+import build_contact_sheet
+import check_legibility
+import gallery_manifest
+import remove_background
+from image_tiles import DEFAULT_MAX_MEMORY_MB, MemoryBudget
+
+BASE_DIR = Path(__file__).parent
+WATCH_ROOTS = [BASE_DIR / "selected", BASE_DIR / "concepts"]
+SKIP_DIRS = set(remove_background.VARIANT_DIRS)
+
+DEBOUNCE_SECONDS = 1.0
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """Minimal ctypes binding for inotify(7)."""
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs: Dict[int, Path] = {}
+
+    def add_watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {directory}")
+        self.dirs[wd] = directory
+
+    def read(self, timeout: float) -> List[Tuple[Path, int]]:
+        """(path, mask) events, waiting up to `timeout` seconds for the first."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+            offset += EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                events.append((BASE_DIR, mask))
+                continue
+            directory = self.dirs.get(wd)
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            if directory is not None:
+                events.append((directory / os.fsdecode(name) if name else directory, mask))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def watch_dirs(root: Path) -> Iterable[Path]:
+    """root and its subfolders, minus variant output folders."""
+    if not root.is_dir():
+        return
+    yield root
+    for sub in sorted(root.iterdir()):
+        if sub.is_dir() and sub.name not in SKIP_DIRS:
+            yield from watch_dirs(sub)
+
+
+def is_source(path: Path) -> bool:
+    return path.suffix == ".png" and path.parent.name not in SKIP_DIRS
+
+
+def remove_variants(path: Path) -> List[Path]:
+    removed = []
+    for out in remove_background.output_paths(path):
+        if out.exists():
+            out.unlink()
+            removed.append(out)
+    return removed
+
+
+class GalleryWatcher:
+    """Debounces source events and rebuilds the affected derivatives."""
+
+    def __init__(self, workers: int, budget: MemoryBudget, debounce: float):
+        self.workers = workers
+        self.budget = budget
+        self.band_bytes = budget.per_worker(workers)
+        self.debounce = debounce
+        self.dark_ink = np.asarray(remove_background.hex_to_rgb(remove_background.DARK_INK), dtype=np.uint8)
+        self.pending: Dict[Path, float] = {}
+        self.manifest = gallery_manifest.load_manifest()
+        self.scores = check_legibility.load_scores()
+        self.inotify = Inotify()
+        for root in WATCH_ROOTS:
+            for directory in watch_dirs(root):
+                self.inotify.add_watch(directory)
+
+    def queue(self, path: Path) -> None:
+        self.pending[path] = time.monotonic()
+
+    def handle(self, path: Path, mask: int) -> None:
+        if mask & IN_Q_OVERFLOW:
+            print("  Event queue overflowed; checking all sources for staleness")
+            self.catch_up()
+        elif mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO) and path.name not in SKIP_DIRS:
+                for directory in watch_dirs(path):
+                    self.inotify.add_watch(directory)
+                    for png in directory.glob("*.png"):
+                        self.queue(png)
+        elif is_source(path):
+            self.queue(path)
+
+    def catch_up(self) -> None:
+        for root in WATCH_ROOTS:
+            for directory in watch_dirs(root):
+                for png in directory.glob("*.png"):
+                    if remove_background.is_stale(png):
+                        self.queue(png)
+
+    def rebuild_file(self, path: Path) -> List[Path]:
+        """Per-file derivatives. Returns every file written or removed."""
+        if not path.exists():
+            return [path] + remove_variants(path)
+        remove_background.process_image(path, self.budget, self.band_bytes,
+                                         remove_background.SOFTNESS, self.dark_ink)
+        return [path, *remove_background.output_paths(path)]
+
+    def rebuild_section(self, directory: Path, changed: List[Path]) -> None:
+        """Contact sheet and atlas for one folder."""
+        if not build_contact_sheet.list_sources(directory):
+            return
+        if not build_contact_sheet.update_sheets(directory, changed, self.budget):
+            build_contact_sheet.build_sheets(directory, 6, build_contact_sheet.CELL_SIZE,
+                                             self.workers, self.budget)
+
+    def flush(self) -> None:
+        """Rebuild everything whose last event is older than the debounce interval."""
+        now = time.monotonic()
+        ready = sorted(p for p, t in self.pending.items() if now - t >= self.debounce)
+        if not ready:
+            return
+        for path in ready:
+            del self.pending[path]
+
+        start = time.time()
+        touched: Set[Path] = set()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for result in pool.map(self._safe_rebuild, ready):
+                touched.update(result)
+
+        try:
+            gallery_manifest.update(self.manifest, touched)
+            gallery_manifest.save_manifest(self.manifest)
+        except (OSError, ValueError) as e:
+            print(f"  FAILED: manifest update ({e})")
+        try:
+            check_legibility.update(self.scores, ready, self.workers, self.budget)
+            check_legibility.save_scores(self.scores)
+        except (OSError, ValueError) as e:
+            print(f"  FAILED: legibility scores ({e})")
+
+        sections: Dict[Path, List[Path]] = {}
+        for path in ready:
+            sections.setdefault(path.parent, []).append(path)
+        for directory, changed in sections.items():
+            if directory.is_dir():
+                try:
+                    self.rebuild_section(directory, changed)
+                except (OSError, ValueError) as e:
+                    print(f"  FAILED: sheets for {directory} ({e})")
+
+        names = ", ".join(p.name for p in ready[:4]) + (" ..." if len(ready) > 4 else "")
+        print(f"  Rebuilt {len(ready)} source(s) in {time.time() - start:.1f}s: {names}")
+
+    def _safe_rebuild(self, path: Path) -> List[Path]:
+        try:
+            return self.rebuild_file(path)
+        except (OSError, ValueError) as e:
+            print(f"  FAILED: {path} ({e})")
+            return [path]
+
+    def run(self) -> None:
+        self.catch_up()
+        while True:
+            timeout = self.debounce / 4 if self.pending else None
+            for path, mask in self.inotify.read(timeout):
+                self.handle(path, mask)
+            self.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch gallery folders and rebuild affected derivatives")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS,
+                        help=f"Seconds a file must be quiet before rebuilding (default: {DEBOUNCE_SECONDS})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="Parallel rebuild workers (default: CPU count)")
+    parser.add_argument("--max-memory-mb", type=int, default=DEFAULT_MAX_MEMORY_MB,
+                        help=f"Memory budget shared by all workers (default: {DEFAULT_MAX_MEMORY_MB})")
+    args = parser.parse_args()
+
+    if not sys.platform.startswith("linux"):
+        print("Error: watch mode needs Linux inotify")
+        sys.exit(1)
+
+    watcher = GalleryWatcher(args.workers, MemoryBudget.from_mb(args.max_memory_mb), args.debounce)
+    print(f"\n{'='*60}")
+    print(f"Watching {len(watcher.inotify.dirs)} folder(s) under selected/ and concepts/")
+    print(f"{'='*60}")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\nStopped")
+    finally:
+        watcher.inotify.close()
+
+
+if __name__ == "__main__":
+    main()